@@ -4,15 +4,13 @@ from typing import Optional
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 import os
 from sqlalchemy.orm import Session
 
 from infrastructure.databases.database_config import get_db
+from security.authentication.passwords import get_password_hash, verify_and_update_password, verify_password
 from core.lms_core.users.models import User
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # JWT Configuration
@@ -21,21 +19,21 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hour
 
 
-def verify_password(plain_password, hashed_password):
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    """Hash a password"""
-    return pwd_context.hash(password)
-
-
 def authenticate_user(db: Session, username: str, password: str):
     """Authenticate a user"""
     user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return False
+
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
+        return False
+
+    # Rehash passwords stored with a deprecated scheme or cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     return user
 
 
@@ -86,10 +84,10 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 
 def has_role(required_roles):
     """Check if user has required roles"""
+    required_roles = frozenset(required_roles)
 
     async def role_checker(current_user: User = Depends(get_current_user)):
-        user_roles = [role.name for role in current_user.roles]
-        if not any(role in user_roles for role in required_roles):
+        if required_roles.isdisjoint(role.name for role in current_user.roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions",
@@ -7,14 +7,12 @@ from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
 from infrastructure.databases.database_config import get_db, get_redis_client
+from security.authentication.passwords import get_password_hash, verify_and_update_password, verify_password
 from core.lms_core.users.models import User, Role
 from core.lms_core.users.crud import get_user_by_email, get_user_by_username
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 configuration
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
@@ -33,20 +31,6 @@ RESET_TOKEN_KEY_PREFIX = "reset_token:"
 VERIFICATION_TOKEN_KEY_PREFIX = "verification_token:"
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against a hash
-    """
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """
-    Hash a password
-    """
-    return pwd_context.hash(password)
-
-
 async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user with username/email and password
@@ -67,13 +51,22 @@ async def authenticate_user(db: Session, username: str, password: str) -> Option
         user = get_user_by_email(db, username)
 
     # Verify user exists and password is correct
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
 
     # Check if user is active
     if not user.is_active:
         return None
 
+    # Rehash passwords stored with a deprecated scheme or cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     return user
 
 
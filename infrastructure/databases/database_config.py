@@ -5,6 +5,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from clickhouse_driver import Client
 import redis
+import redis.asyncio
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -39,19 +40,24 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 
+# Rows per multi-row INSERT when batching executemany / ORM bulk flushes
+INSERTMANYVALUES_PAGE_SIZE = int(os.getenv("INSERTMANYVALUES_PAGE_SIZE", "1000"))
+
 # Create SQLAlchemy engine with connection pooling
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
         pool_size=20,
-        max_overflow=0
+        max_overflow=0,
+        insertmanyvalues_page_size=INSERTMANYVALUES_PAGE_SIZE
     )
 else:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
         pool_size=20,
-        max_overflow=0
+        max_overflow=0,
+        insertmanyvalues_page_size=INSERTMANYVALUES_PAGE_SIZE
     )
 
 # Create session factory
@@ -86,6 +92,29 @@ def get_redis_client():
         decode_responses=True
     )
 
+# Shared asyncio Redis client, created on first use
+_async_redis_client = None
+
+def get_async_redis_client():
+    """
+    Get the shared asyncio Redis client instance
+
+    Async services use this single client (and its connection pool) instead of
+    building a blocking client per call.
+    """
+    global _async_redis_client
+
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            db=REDIS_DB,
+            decode_responses=True
+        )
+
+    return _async_redis_client
+
 # Dependency to get the database session
 def get_db():
     """
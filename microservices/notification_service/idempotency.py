@@ -0,0 +1,51 @@
+# microservices/notification_service/idempotency.py
+import logging
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Idempotency key marking a notification as dispatched on a channel
+NOTIFICATION_SEEN_KEY = "notif:seen:{channel}:{notification_id}"
+NOTIFICATION_SEEN_TTL = 60 * 60
+
+
+async def claim_notification(redis_client, notification_id: str, channel: str) -> bool:
+    """
+    Atomically claim a notification for dispatch using SET NX
+
+    A claim that is not followed by a successful send must be given back with
+    release_notification, otherwise retries within NOTIFICATION_SEEN_TTL are dropped.
+
+    Args:
+        redis_client: asyncio Redis client instance
+        notification_id: Notification ID
+        channel: Delivery channel (push, websocket, queued)
+
+    Returns:
+        bool: True if the caller should dispatch, False if it was already claimed
+    """
+    key = NOTIFICATION_SEEN_KEY.format(channel=channel, notification_id=notification_id)
+
+    try:
+        return bool(await redis_client.set(key, "1", nx=True, ex=NOTIFICATION_SEEN_TTL))
+    except Exception as e:
+        # Prefer a possible duplicate over dropping the notification
+        logger.error(f"Error claiming notification {notification_id}: {str(e)}")
+        return True
+
+
+async def release_notification(redis_client, notification_id: str, channel: str):
+    """
+    Give back a claim after a failed send so the notification can be retried
+
+    Args:
+        redis_client: asyncio Redis client instance
+        notification_id: Notification ID
+        channel: Delivery channel (push, websocket, queued)
+    """
+    key = NOTIFICATION_SEEN_KEY.format(channel=channel, notification_id=notification_id)
+
+    try:
+        await redis_client.delete(key)
+    except Exception as e:
+        logger.error(f"Error releasing notification {notification_id}: {str(e)}")
@@ -9,10 +9,13 @@ import json
 import asyncio
 from datetime import datetime
 
+from infrastructure.databases.database_config import get_async_redis_client
 from infrastructure.event_bus.kafka_config import get_kafka_consumer, get_kafka_producer, NOTIFICATION_TOPIC
 from microservices.notification_service.email.sender import send_email
+from microservices.notification_service.idempotency import claim_notification, release_notification
 from microservices.notification_service.push.sender import send_push_notification
 from microservices.notification_service.schemas import EmailNotification, PushNotification, WebSocketNotification
+from microservices.notification_service.websocket.handler import connection_manager
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -113,15 +116,26 @@ async def send_websocket_notification(notification: WebSocketNotification):
     try:
         # Check if user is connected
         if notification.recipient_id in connected_clients:
+            redis_client = get_async_redis_client()
+
+            # Skip notifications that were already delivered
+            if not await claim_notification(redis_client, notification.notification_id, "websocket"):
+                return {"status": "duplicate", "notification_id": notification.notification_id}
+
             # Send notification through WebSocket
-            await connected_clients[notification.recipient_id].send_text(
-                json.dumps({
-                    "type": notification.notification_type,
-                    "title": notification.title,
-                    "message": notification.message,
-                    "data": notification.data
-                })
-            )
+            try:
+                await connected_clients[notification.recipient_id].send_text(
+                    json.dumps({
+                        "type": notification.notification_type,
+                        "title": notification.title,
+                        "message": notification.message,
+                        "data": notification.data
+                    })
+                )
+            except Exception:
+                # Not delivered, so let a retry dispatch it again
+                await release_notification(redis_client, notification.notification_id, "websocket")
+                raise
 
             # Also publish to Kafka for tracking
             producer = get_kafka_producer()
@@ -193,6 +207,9 @@ async def shutdown_event():
     """Shutdown tasks"""
     logger.info("Shutting down Notification Service")
 
+    # Withdraw this instance's WebSocket users instead of waiting for their heartbeat to expire
+    await connection_manager.close()
+
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
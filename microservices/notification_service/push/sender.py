@@ -1,10 +1,16 @@
 # microservices/notification_service/push/sender.py
+import asyncio
 import logging
 import json
 import os
+import time
 import httpx
-from typing import Dict, List, Optional
+import requests
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
+from infrastructure.databases.database_config import get_async_redis_client
+from microservices.notification_service.idempotency import claim_notification, release_notification
 from microservices.notification_service.schemas import PushNotification
 
 # Initialize logging
@@ -19,6 +25,120 @@ VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
 VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY")
 VAPID_CLAIM_EMAIL = os.getenv("VAPID_CLAIM_EMAIL", "mailto:admin@yourlms.com")
 
+# Retry and circuit breaker configuration for push providers
+PUSH_RETRY_ATTEMPTS = 5
+PUSH_RETRY_INITIAL_WAIT = 0.1
+PUSH_RETRY_MAX_WAIT = 30
+CIRCUIT_FAIL_MAX = 20
+CIRCUIT_RESET_TIMEOUT = 60
+
+# Redis list holding payloads rejected while a provider's circuit is open
+PUSH_DLQ_KEY = "push:dlq:{provider}"
+
+
+class CircuitBreakerError(Exception):
+    """Raised when a call is rejected because the provider circuit is open"""
+
+
+class PushProviderError(Exception):
+    """Raised for a provider server error so the breaker counts it as a failure"""
+
+    def __init__(self, response):
+        super().__init__(f"Push provider error: {response.status_code}")
+        self.response = response
+
+
+class CircuitBreaker:
+    """
+    Minimal async circuit breaker, one instance per push provider
+
+    After `fail_max` consecutive failures the circuit opens and calls fail fast
+    with CircuitBreakerError. Once `reset_timeout` seconds have passed a single
+    trial call is let through: success closes the circuit, failure re-opens it.
+    Other calls made while that trial is in flight fail fast as well.
+    """
+
+    def __init__(self, name: str, fail_max: int = CIRCUIT_FAIL_MAX, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Call `func` through the breaker
+
+        Raises:
+            CircuitBreakerError: If the circuit is open
+        """
+        if self.is_open:
+            raise CircuitBreakerError(f"Circuit for {self.name} is open")
+
+        half_open = self.opened_at is not None
+
+        if half_open:
+            if self.trial_in_progress:
+                raise CircuitBreakerError(f"Circuit for {self.name} is half-open, trial call in progress")
+            self.trial_in_progress = True
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.failure_count += 1
+            if half_open or self.failure_count >= self.fail_max:
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit for {self.name} opened after {self.failure_count} failures")
+            raise
+        finally:
+            if half_open:
+                self.trial_in_progress = False
+
+        self.failure_count = 0
+        self.opened_at = None
+        return result
+
+
+# One breaker per provider so a dead provider does not stall the others
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    "firebase": CircuitBreaker("firebase"),
+    "web": CircuitBreaker("web"),
+}
+
+
+def _push_retrying(*exception_types) -> AsyncRetrying:
+    """
+    Build the retry policy used for provider calls
+
+    Args:
+        exception_types: Transient exception types that should be retried
+    """
+    return AsyncRetrying(
+        stop=stop_after_attempt(PUSH_RETRY_ATTEMPTS),
+        wait=wait_exponential_jitter(initial=PUSH_RETRY_INITIAL_WAIT, max=PUSH_RETRY_MAX_WAIT),
+        retry=retry_if_exception_type(exception_types),
+        reraise=True
+    )
+
+
+async def push_to_dead_letter_queue(provider: str, payload: Dict):
+    """
+    Store an undelivered payload so it can be replayed once the provider recovers
+
+    Args:
+        provider: Push provider name (firebase, web)
+        payload: Payload that could not be delivered
+    """
+    try:
+        await get_async_redis_client().lpush(PUSH_DLQ_KEY.format(provider=provider), json.dumps(payload))
+    except Exception as e:
+        logger.error(f"Error pushing {provider} notification to dead letter queue: {str(e)}")
+
 
 async def send_push_notification(notification: PushNotification):
     """
@@ -27,6 +147,15 @@ async def send_push_notification(notification: PushNotification):
     Args:
         notification: The push notification to send
     """
+    redis_client = get_async_redis_client()
+
+    # Skip notifications that were already dispatched (e.g. a retry after a late success)
+    if not await claim_notification(redis_client, notification.notification_id, "push"):
+        logger.info(f"Push notification {notification.notification_id} already dispatched, skipping")
+        return True
+
+    success = False
+
     try:
         # Get user device tokens - in a real implementation, this would fetch from a database
         device_tokens = await get_user_device_tokens(notification.recipient_id)
@@ -36,8 +165,6 @@ async def send_push_notification(notification: PushNotification):
             return False
 
         # Send to each device
-        success = False
-
         for token_info in device_tokens:
             if token_info["type"] == "firebase":
                 result = await send_firebase_notification(
@@ -58,6 +185,11 @@ async def send_push_notification(notification: PushNotification):
         logger.error(f"Error sending push notification: {str(e)}")
         raise
 
+    finally:
+        # Nothing was delivered, so let a retry dispatch it again
+        if not success:
+            await release_notification(redis_client, notification.notification_id, "push")
+
 
 async def get_user_device_tokens(user_id: int) -> List[Dict]:
     """
@@ -119,13 +251,30 @@ async def send_firebase_notification(token: str, notification: PushNotification)
             "Authorization": f"key={FIREBASE_SERVER_KEY}"
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                FIREBASE_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=5.0
-            )
+        async def post_with_retry():
+            async with httpx.AsyncClient() as client:
+                async for attempt in _push_retrying(httpx.TransportError, httpx.TimeoutException, PushProviderError):
+                    with attempt:
+                        response = await client.post(
+                            FIREBASE_API_URL,
+                            headers=headers,
+                            json=payload,
+                            timeout=5.0
+                        )
+                        # Server errors are transient and count against the breaker
+                        if response.status_code >= 500:
+                            raise PushProviderError(response)
+                        return response
+
+        try:
+            response = await circuit_breakers["firebase"].call(post_with_retry)
+        except CircuitBreakerError:
+            logger.warning("Firebase circuit open, notification moved to dead letter queue")
+            await push_to_dead_letter_queue("firebase", payload)
+            return False
+        except PushProviderError as e:
+            logger.error(f"Firebase API error: {e.response.status_code} - {e.response.text}")
+            return False
 
         if response.status_code == 200:
             response_data = response.json()
@@ -177,15 +326,41 @@ async def send_web_push_notification(subscription_info: str, notification: PushN
         # Add notification ID for tracking
         payload["data"]["notification_id"] = notification.notification_id
 
+        def send_webpush():
+            try:
+                return webpush(
+                    subscription_info=subscription,
+                    data=json.dumps(payload),
+                    vapid_private_key=VAPID_PRIVATE_KEY,
+                    vapid_claims={
+                        "sub": VAPID_CLAIM_EMAIL
+                    }
+                )
+            except WebPushException as e:
+                # webpush raises for every non-2xx status; only server errors are provider failures
+                if e.response is None:
+                    raise
+                if e.response.status_code >= 500:
+                    raise PushProviderError(e.response) from e
+                return e.response
+
+        async def webpush_with_retry():
+            retry_types = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, PushProviderError)
+            async for attempt in _push_retrying(*retry_types):
+                with attempt:
+                    # pywebpush is blocking, so it runs in a worker thread instead of the event loop
+                    return await asyncio.to_thread(send_webpush)
+
         # Send web push notification
-        response = webpush(
-            subscription_info=subscription,
-            data=json.dumps(payload),
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims={
-                "sub": VAPID_CLAIM_EMAIL
-            }
-        )
+        try:
+            response = await circuit_breakers["web"].call(webpush_with_retry)
+        except CircuitBreakerError:
+            logger.warning("Web Push circuit open, notification moved to dead letter queue")
+            await push_to_dead_letter_queue("web", {"subscription": subscription, "payload": payload})
+            return False
+        except PushProviderError as e:
+            logger.warning(f"Web Push notification failed: {e.response.status_code} - {e.response.text}")
+            return False
 
         if response.status_code == 201:
             logger.info(f"Web Push notification sent successfully")
@@ -1,5 +1,5 @@
 # Notification schemas
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, Optional, Any, List
 from datetime import datetime
 import uuid
@@ -17,7 +17,7 @@ class NotificationBase(BaseModel):
 
 class NotificationCreate(NotificationBase):
     """Schema for creating notifications"""
-    notification_id: str = str(uuid.uuid4())
+    notification_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
 
 
 class Notification(NotificationBase):
@@ -36,7 +36,7 @@ class EmailNotification(BaseModel):
     recipient_email: str
     subject: str
     body: str
-    notification_id: str = str(uuid.uuid4())
+    notification_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     html_body: Optional[str] = None
     cc: Optional[List[str]] = None
     bcc: Optional[List[str]] = None
@@ -47,7 +47,7 @@ class PushNotification(BaseModel):
     recipient_id: int
     title: str
     body: str
-    notification_id: str = str(uuid.uuid4())
+    notification_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     icon: Optional[str] = None
     data: Optional[Dict[str, Any]] = None
 
@@ -58,5 +58,5 @@ class WebSocketNotification(BaseModel):
     notification_type: str
     title: str
     message: str
-    notification_id: str = str(uuid.uuid4())
+    notification_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     data: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -5,23 +5,45 @@ import asyncio
 from typing import Dict, List, Optional, Set, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
+import time
 import uuid
 
-from infrastructure.databases.database_config import get_redis_client
+from infrastructure.databases.database_config import get_async_redis_client
+from microservices.notification_service.idempotency import claim_notification, release_notification
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# Identifies this process among the instances sharing Redis
+INSTANCE_ID = uuid.uuid4().hex
+
+# Redis set of user IDs with an open connection on one instance, expires unless heartbeated
+INSTANCE_USERS_KEY = "ws:instance:{instance_id}:users"
+# Redis sorted set of instance IDs scored by their last heartbeat time
+ONLINE_INSTANCES_KEY = "ws:instances"
+# Scratch Redis set the union of all live instance sets is stored into when counting,
+# one per call and deleted in the same transaction
+ONLINE_USERS_KEY = "ws:online_users:{token}"
+
+# Seconds between heartbeats, and after which a silent instance counts as gone
+HEARTBEAT_INTERVAL = 15
+INSTANCE_TTL = 3 * HEARTBEAT_INTERVAL
+
 
 class ConnectionManager:
     """
     WebSocket connection manager for real-time notifications
     """
 
-    def __init__(self):
+    def __init__(self, instance_id: str = INSTANCE_ID):
         self.active_connections: Dict[int, Set[WebSocket]] = {}
         self.user_status: Dict[int, Dict] = {}
-        self.redis = get_redis_client()
+        self.redis = get_async_redis_client()
+        self.instance_id = instance_id
+        self.instance_users_key = INSTANCE_USERS_KEY.format(instance_id=instance_id)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Orders heartbeat rewrites against single-user updates of the instance set
+        self._presence_lock = asyncio.Lock()
 
     async def connect(self, websocket: WebSocket, user_id: int):
         """
@@ -39,6 +61,12 @@ class ConnectionManager:
 
         self.active_connections[user_id].add(websocket)
 
+        # Publish this instance's users until the instance stops heartbeating
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self.heartbeat_loop())
+        async with self._presence_lock:
+            await self.redis.sadd(self.instance_users_key, user_id)
+
         # Update user status
         self.user_status[user_id] = {
             "status": "online",
@@ -47,7 +75,7 @@ class ConnectionManager:
         }
 
         # Store in Redis for distributed deployment
-        self.redis.hset(
+        await self.redis.hset(
             f"user:status:{user_id}",
             mapping=self.user_status[user_id]
         )
@@ -74,38 +102,130 @@ class ConnectionManager:
             user_id: User ID
         """
         # Remove connection
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
-
-            # Update status if no connections left
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-
-                # Update user status
-                self.user_status[user_id] = {
-                    "status": "offline",
-                    "last_seen": datetime.utcnow().isoformat(),
-                    "connection_count": 0
-                }
-
-                # Update in Redis
-                self.redis.hset(
-                    f"user:status:{user_id}",
-                    mapping=self.user_status[user_id]
-                )
-            else:
-                # Update connection count
-                self.user_status[user_id]["connection_count"] = len(self.active_connections[user_id])
-
-                # Update in Redis
-                self.redis.hset(
-                    f"user:status:{user_id}",
-                    "connection_count",
-                    len(self.active_connections[user_id])
-                )
+        await self.remove_connections(user_id, {websocket})
 
         logger.info(f"User {user_id} disconnected from WebSocket")
 
+    async def remove_connections(self, user_id: int, websockets: Set[WebSocket]):
+        """
+        Remove connections of a user and update the shared status
+
+        Only connections still registered are removed and released, so a
+        connection that was already dropped (e.g. by a concurrent disconnect)
+        is not released twice.
+
+        Args:
+            user_id: User ID
+            websockets: Connections to remove
+        """
+        current = self.active_connections.get(user_id)
+        if not current:
+            return
+
+        stale = websockets & current
+        if not stale:
+            return
+
+        current -= stale
+
+        # Update status if no connections left
+        if not current:
+            # Drop the entry before awaiting so a concurrent connect starts a fresh set
+            del self.active_connections[user_id]
+
+            # The user is offline on this instance once its last connection is gone
+            async with self._presence_lock:
+                await self.redis.srem(self.instance_users_key, user_id)
+
+            # Update user status
+            self.user_status[user_id] = {
+                "status": "offline",
+                "last_seen": datetime.utcnow().isoformat(),
+                "connection_count": 0
+            }
+
+            # Update in Redis
+            await self.redis.hset(
+                f"user:status:{user_id}",
+                mapping=self.user_status[user_id]
+            )
+        else:
+            # Update connection count
+            self.user_status.setdefault(user_id, {})["connection_count"] = len(current)
+
+            # Update in Redis
+            await self.redis.hset(
+                f"user:status:{user_id}",
+                "connection_count",
+                len(current)
+            )
+
+    async def heartbeat(self):
+        """
+        Rewrite this instance's online users and refresh its liveness
+
+        The set is rebuilt from the local connections, so anything a crashed
+        or partial update left behind is corrected on the next beat. The
+        snapshot and the rewrite run under the presence lock: otherwise a
+        snapshot taken before a connect (or disconnect) and written after its
+        SADD (or SREM) would drop a new user, or bring back a departed one,
+        until the next beat.
+        """
+        async with self._presence_lock:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self.instance_users_key)
+                if self.active_connections:
+                    pipe.sadd(self.instance_users_key, *self.active_connections)
+                pipe.expire(self.instance_users_key, INSTANCE_TTL)
+                pipe.zadd(ONLINE_INSTANCES_KEY, {self.instance_id: time.time()})
+                await pipe.execute()
+
+    async def heartbeat_loop(self):
+        """
+        Send a heartbeat every HEARTBEAT_INTERVAL seconds until cancelled
+        """
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Error sending WebSocket instance heartbeat: {str(e)}")
+
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def close(self):
+        """
+        Stop heartbeating and withdraw this instance's online users
+
+        Called on service shutdown, so other instances stop counting these
+        users right away instead of after INSTANCE_TTL.
+        """
+        if self._heartbeat_task is None:
+            # Never had a connection, so nothing was published
+            return
+
+        self._heartbeat_task.cancel()
+        self._heartbeat_task = None
+
+        try:
+            await self.redis.zrem(ONLINE_INSTANCES_KEY, self.instance_id)
+            await self.redis.delete(self.instance_users_key)
+        except Exception as e:
+            # The entries expire after INSTANCE_TTL anyway
+            logger.error(f"Error withdrawing WebSocket instance {self.instance_id}: {str(e)}")
+
+    async def get_live_instance_keys(self) -> List[str]:
+        """
+        Get the online-user set keys of instances with a recent heartbeat
+
+        Returns:
+            List[str]: Redis keys of the live instances' user sets
+        """
+        # Prune instances that stopped heartbeating; their sets expire on their own
+        await self.redis.zremrangebyscore(ONLINE_INSTANCES_KEY, "-inf", time.time() - INSTANCE_TTL)
+        instances = await self.redis.zrange(ONLINE_INSTANCES_KEY, 0, -1)
+
+        return [INSTANCE_USERS_KEY.format(instance_id=instance_id) for instance_id in instances]
+
     async def send_personal_message(self, message: dict, user_id: int) -> bool:
         """
         Send a message to a specific user
@@ -130,37 +250,31 @@ class ConnectionManager:
             logger.debug(f"User {user_id} not connected, message queued: {message['id']}")
             return False
 
-        # Encode message as JSON
+        # Encode message as JSON once for all connections
         message_json = json.dumps(message)
 
+        # Send to all connections for this user concurrently
+        connections = list(self.active_connections[user_id])
+        results = await asyncio.gather(
+            *(websocket.send_text(message_json) for websocket in connections),
+            return_exceptions=True
+        )
+
         # Track successful sends
-        success = False
         failed_connections = set()
 
-        # Send to all connections for this user
-        for websocket in self.active_connections[user_id]:
-            try:
-                await websocket.send_text(message_json)
-                success = True
-                logger.debug(f"Message {message['id']} sent to user {user_id}")
-            except Exception as e:
-                logger.error(f"Error sending message to user {user_id}: {str(e)}")
+        for websocket, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending message to user {user_id}: {str(result)}")
                 failed_connections.add(websocket)
 
-        # Clean up failed connections
-        for websocket in failed_connections:
-            self.active_connections[user_id].discard(websocket)
+        success = len(failed_connections) < len(connections)
+        if success:
+            logger.debug(f"Message {message['id']} sent to user {user_id}")
 
-        # Update connection count if any failed
+        # Clean up failed connections that are still registered
         if failed_connections:
-            self.user_status[user_id]["connection_count"] = len(self.active_connections[user_id])
-
-            # Update in Redis
-            self.redis.hset(
-                f"user:status:{user_id}",
-                "connection_count",
-                len(self.active_connections[user_id])
-            )
+            await self.remove_connections(user_id, failed_connections)
 
             # If all connections failed, queue the message
             if not success:
@@ -212,10 +326,10 @@ class ConnectionManager:
         notification_key = f"user:notifications:{user_id}"
 
         # Store message as JSON string
-        self.redis.lpush(notification_key, json.dumps(message))
+        await self.redis.lpush(notification_key, json.dumps(message))
 
         # Set TTL for queued notifications (30 days)
-        self.redis.expire(notification_key, 60 * 60 * 24 * 30)
+        await self.redis.expire(notification_key, 60 * 60 * 24 * 30)
 
         logger.debug(f"Notification queued for user {user_id}: {message['id']}")
 
@@ -230,43 +344,55 @@ class ConnectionManager:
         # Get queued notifications from Redis
         notification_key = f"user:notifications:{user_id}"
 
-        # Check if there are any queued notifications
-        queue_length = self.redis.llen(notification_key)
+        # Take the whole queue in one transaction so notifications queued meanwhile are not lost
+        async with self.redis.pipeline(transaction=True) as pipe:
+            notifications, _ = await pipe.lrange(notification_key, 0, -1).delete(notification_key).execute()
+
+        if not notifications:
+            return
 
-        if queue_length > 0:
-            logger.info(f"Sending {queue_length} queued notifications to user {user_id}")
+        logger.info(f"Sending {len(notifications)} queued notifications to user {user_id}")
 
-            # Get all queued notifications
-            notifications = self.redis.lrange(notification_key, 0, -1)
+        # Notifications that could not be delivered go back on the queue
+        undelivered = []
 
-            # Send each notification
-            for notification_json in notifications:
+        # Send each notification
+        for notification_json in notifications:
+            try:
+                notification = json.loads(notification_json)
+            except json.JSONDecodeError:
+                logger.error(f"Invalid JSON in queued notification for user {user_id}")
+                continue
+
+            # Skip duplicates and notifications already drained by another connection
+            if not await claim_notification(self.redis, notification.get("id"), "queued"):
+                continue
+
+            # Set "queued" flag
+            notification["queued"] = True
+            notification_text = json.dumps(notification)
+
+            # Send notification
+            connections = [websocket] if websocket else list(self.active_connections.get(user_id, set()))
+            delivered = False
+            for conn in connections:
                 try:
-                    notification = json.loads(notification_json)
-
-                    # Set "queued" flag
-                    notification["queued"] = True
-
-                    # Send notification
-                    if websocket:
-                        await websocket.send_text(json.dumps(notification))
-                    else:
-                        # Skip queueing if sending fails
-                        for conn in self.active_connections.get(user_id, set()):
-                            try:
-                                await conn.send_text(json.dumps(notification))
-                            except Exception as e:
-                                logger.error(f"Error sending queued notification: {str(e)}")
-
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in queued notification for user {user_id}")
+                    await conn.send_text(notification_text)
+                    delivered = True
                 except Exception as e:
-                    logger.error(f"Error processing queued notification: {str(e)}")
+                    logger.error(f"Error sending queued notification: {str(e)}")
 
-            # Delete the notifications from the queue
-            self.redis.delete(notification_key)
+            if not delivered:
+                await release_notification(self.redis, notification.get("id"), "queued")
+                undelivered.append(notification_json)
 
-    def get_user_status(self, user_id: int) -> Dict:
+        if undelivered:
+            # Oldest notifications sit at the tail of the queue, so append them there again
+            await self.redis.rpush(notification_key, *undelivered)
+            await self.redis.expire(notification_key, 60 * 60 * 24 * 30)
+            logger.info(f"Re-queued {len(undelivered)} undelivered notifications for user {user_id}")
+
+    async def get_user_status(self, user_id: int) -> Dict:
         """
         Get a user's online status
 
@@ -281,11 +407,11 @@ class ConnectionManager:
             return self.user_status[user_id]
 
         # Check Redis for distributed deployment
-        status = self.redis.hgetall(f"user:status:{user_id}")
+        status = await self.redis.hgetall(f"user:status:{user_id}")
 
         if status:
-            # Convert from bytes to string
-            return {k.decode(): v.decode() for k, v in status.items()}
+            # The client decodes responses, so the hash is already a dict of strings
+            return status
 
         # Default status if not found
         return {
@@ -294,21 +420,40 @@ class ConnectionManager:
             "connection_count": 0
         }
 
-    def get_online_users(self) -> List[int]:
+    async def get_online_users(self) -> List[int]:
         """
         Get a list of all online users
 
         Returns:
-            List[int]: List of online user IDs
+            List[int]: List of online user IDs across all instances
+        """
+        instance_keys = await self.get_live_instance_keys()
+        if not instance_keys:
+            return []
+
+        return [int(user_id) for user_id in await self.redis.sunion(instance_keys)]
+
+    async def get_online_user_count(self) -> int:
+        """
+        Get the number of online users without fetching their IDs
+
+        Users are tracked per instance, so the count is a union across the
+        live instances: O(total members of their sets) on the Redis side,
+        not O(1) like SCARD on a single global set. Only the size is sent
+        back, and the scratch set is deleted in the same transaction.
+
+        Returns:
+            int: Number of online users across all instances
         """
-        # Local connections
-        local_online = list(self.active_connections.keys())
+        instance_keys = await self.get_live_instance_keys()
+        if not instance_keys:
+            return 0
 
-        # Check Redis for other instances
-        # In a real distributed deployment, you would use Redis to track all online users
-        # This is a simplified implementation
+        union_key = ONLINE_USERS_KEY.format(token=uuid.uuid4().hex)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            count, _ = await pipe.sunionstore(union_key, instance_keys).delete(union_key).execute()
 
-        return local_online
+        return count
 
     async def update_user_status(self, user_id: int, status: str):
         """
@@ -332,7 +477,7 @@ class ConnectionManager:
             self.user_status[user_id]["last_seen"] = datetime.utcnow().isoformat()
 
             # Update in Redis
-            self.redis.hset(
+            await self.redis.hset(
                 f"user:status:{user_id}",
                 mapping={
                     "status": status,
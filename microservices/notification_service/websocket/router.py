@@ -6,7 +6,7 @@ from typing import Dict, List, Optional
 import jwt
 import os
 
-from microservices.notification_service.websocket.handler import notification_manager
+from microservices.notification_service.websocket.handler import connection_manager as notification_manager
 
 # Initialize logging
 logger = logging.getLogger(__name__)
@@ -115,7 +115,7 @@ async def get_user_status(user_id: int):
     """
     Get a user's online status
     """
-    status = notification_manager.get_user_status(user_id)
+    status = await notification_manager.get_user_status(user_id)
     return {"user_id": user_id, "status": status}
 
 
@@ -124,5 +124,13 @@ async def get_online_users():
     """
     Get a list of all online users
     """
-    online_users = notification_manager.get_online_users()
-    return {"online_users": online_users, "count": len(online_users)}
\ No newline at end of file
+    online_users = await notification_manager.get_online_users()
+    return {"online_users": online_users, "count": len(online_users)}
+
+
+@router.get("/notifications/online-users/count")
+async def get_online_user_count():
+    """
+    Get the number of online users
+    """
+    return {"count": await notification_manager.get_online_user_count()}
\ No newline at end of file
@@ -30,13 +30,16 @@ def create_sample_data():
 
         print("Creating sample data...")
 
+        # Take one timestamp so all sample dates are consistent with each other
+        now = datetime.now()
+        course_end_date = now + timedelta(days=90)
+
         # Create roles
         admin_role = Role(name="admin", description="Administrator with full system access")
         instructor_role = Role(name="instructor", description="Teacher role with course management permissions")
         student_role = Role(name="student", description="Student role with learning permissions")
 
         db.add_all([admin_role, instructor_role, student_role])
-        db.commit()
 
         # Create admin user
         admin = User(
@@ -69,7 +72,8 @@ def create_sample_data():
         )
         instructor.profile = instructor_profile
 
-        # Create students
+        # Create students (all share a password, so hash it once)
+        student_password_hash = get_password_hash("studentpass")
         students = []
         for i in range(1, 5):
             student = User(
@@ -77,23 +81,24 @@ def create_sample_data():
                 email=f"student{i}@example.com",
                 first_name=f"Student{i}",
                 last_name="User",
-                hashed_password=get_password_hash("studentpass"),
+                hashed_password=student_password_hash,
                 is_active=True,
                 is_verified=True
             )
             student.roles.append(student_role)
             students.append(student)
 
+        # Flush rather than commit so generated IDs are available; everything commits once at the end
         db.add_all([admin, instructor] + students)
-        db.commit()
+        db.flush()
 
         # Create courses
         math_course = Course(
             title="Algebra 101",
             code="MATH101",
             description="Introduction to algebra and mathematical concepts",
-            start_date=datetime.now(),
-            end_date=datetime.now() + timedelta(days=90),
+            start_date=now,
+            end_date=course_end_date,
             is_active=True,
             is_published=True,
             instructor_id=instructor.id
@@ -103,15 +108,15 @@ def create_sample_data():
             title="Biology Basics",
             code="BIO101",
             description="Introduction to biological concepts and principles",
-            start_date=datetime.now(),
-            end_date=datetime.now() + timedelta(days=90),
+            start_date=now,
+            end_date=course_end_date,
             is_active=True,
             is_published=False,  # Not published yet
             instructor_id=instructor.id
         )
 
         db.add_all([math_course, science_course])
-        db.commit()
+        db.flush()
 
         # Create modules for math course
         module1 = Module(
@@ -131,38 +136,35 @@ def create_sample_data():
         module2.courses.append(math_course)
 
         db.add_all([module1, module2])
-        db.commit()
+        db.flush()
 
         # Create content items
-        content_items = [
-            ContentItem(
-                module_id=module1.id,
-                title="What is Algebra?",
-                content_type="text",
-                content="Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols.",
-                position=1,
-                is_published=True
-            ),
-            ContentItem(
-                module_id=module1.id,
-                title="Introduction Video",
-                content_type="video",
-                content="https://example.com/algebra-intro.mp4",
-                position=2,
-                is_published=True
-            ),
-            ContentItem(
-                module_id=module2.id,
-                title="Solving Linear Equations",
-                content_type="text",
-                content="A linear equation is an equation that describes a straight line.",
-                position=1,
-                is_published=True
-            )
-        ]
-
-        db.add_all(content_items)
-        db.commit()
+        db.bulk_insert_mappings(ContentItem, [
+            {
+                "module_id": module1.id,
+                "title": "What is Algebra?",
+                "content_type": "text",
+                "content": "Algebra is a branch of mathematics dealing with symbols and the rules for manipulating these symbols.",
+                "position": 1,
+                "is_published": True
+            },
+            {
+                "module_id": module1.id,
+                "title": "Introduction Video",
+                "content_type": "video",
+                "content": "https://example.com/algebra-intro.mp4",
+                "position": 2,
+                "is_published": True
+            },
+            {
+                "module_id": module2.id,
+                "title": "Solving Linear Equations",
+                "content_type": "text",
+                "content": "A linear equation is an equation that describes a straight line.",
+                "position": 1,
+                "is_published": True
+            }
+        ])
 
         # Create a sample assignment for the math course
         sample_assignment = Assignment(
@@ -170,26 +172,26 @@ def create_sample_data():
             description="Complete these practice problems to test your understanding of basic algebra concepts.",
             course_id=math_course.id,
             created_by_id=instructor.id,
-            due_date=datetime.now() + timedelta(days=14),
+            due_date=now + timedelta(days=14),
             points_possible=100,
             submission_type="online_text",
             is_published=True
         )
 
         db.add(sample_assignment)
-        db.commit()
 
         # Enroll students in courses
-        for student in students:
-            enrollment = Enrollment(
-                student_id=student.id,
-                course_id=math_course.id,
-                enrollment_date=datetime.now() - timedelta(days=5),
-                is_active=True,
-                completion_status="in_progress"
-            )
-            db.add(enrollment)
-
+        enrollment_date = now - timedelta(days=5)
+        db.bulk_insert_mappings(Enrollment, [
+            {
+                "student_id": student.id,
+                "course_id": math_course.id,
+                "enrollment_date": enrollment_date,
+                "is_active": True,
+                "completion_status": "in_progress"
+            }
+            for student in students
+        ])
         db.commit()
 
         print("Sample data created successfully!")
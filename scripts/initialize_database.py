@@ -2,6 +2,7 @@
 import sys
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy_utils import database_exists, create_database
 
 # Add project root to path
@@ -41,6 +42,8 @@ def init_postgres():
 
 def init_clickhouse():
     """Initialize ClickHouse database"""
+    ch_client = None
+
     try:
         # Get ClickHouse client
         ch_client = get_clickhouse_client()
@@ -49,27 +52,34 @@ def init_clickhouse():
         with open("infrastructure/databases/clickhouse_init.sql", "r") as f:
             sql = f.read()
 
-        # Split and execute statements
-        for statement in sql.split(';'):
-            if statement.strip():
-                ch_client.execute(statement)
+        # The native protocol accepts one statement per query, so split the script
+        # up front and send every statement over the same open connection
+        statements = [statement.strip() for statement in sql.split(';') if statement.strip()]
+
+        for statement in statements:
+            ch_client.execute(statement)
 
-        logger.info("Successfully initialized ClickHouse database")
+        logger.info(f"Successfully initialized ClickHouse database ({len(statements)} statements)")
         return True
     except Exception as e:
         logger.error(f"Error initializing ClickHouse: {str(e)}")
         return False
+    finally:
+        if ch_client is not None:
+            ch_client.disconnect()
 
 
 def main():
     """Main initialization function"""
     logger.info("Starting database initialization...")
 
-    # Initialize PostgreSQL
-    pg_success = init_postgres()
+    # PostgreSQL and ClickHouse are independent servers, so initialize them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pg_future = executor.submit(init_postgres)
+        ch_future = executor.submit(init_clickhouse)
 
-    # Initialize ClickHouse
-    ch_success = init_clickhouse()
+        pg_success = pg_future.result()
+        ch_success = ch_future.result()
 
     if pg_success and ch_success:
         logger.info("Database initialization completed successfully!")
@@ -1,21 +1,32 @@
 # Authentication service for the LMS system
 from datetime import datetime, timedelta
 from typing import Optional
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import time
 import jwt
-from fastapi import Depends, FastAPI, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 import os
 from pydantic import BaseModel
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+from infrastructure.databases.database_config import get_db
+from security.authentication.passwords import get_password_hash, verify_and_update_password, verify_password
 
 # JWT Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION = int(os.getenv("JWT_EXPIRATION", "86400"))  # 24 hours
+JWT_SECRET_BYTES = JWT_SECRET.encode()
+
+# Cache of verified token payloads, so repeat requests skip signature verification
+JWT_CACHE_MAXSIZE = 50_000
+JWT_CACHE_TTL = 60  # seconds
+_jwt_cache = TTLCache(maxsize=JWT_CACHE_MAXSIZE, ttl=JWT_CACHE_TTL)
 
 
 class Token(BaseModel):
@@ -36,45 +47,180 @@ class TokenData(BaseModel):
     exp: Optional[datetime] = None
 
 
-def verify_password(plain_password, hashed_password):
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    """Hash a password"""
-    return pwd_context.hash(password)
-
-
 async def authenticate_user(db, username: str, password: str):
     """Authenticate a user"""
     from core.lms_core.users.crud import get_user_by_username
 
-    user = await get_user_by_username(db, username)
+    user = get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
+
+    # Rehash passwords stored with a deprecated scheme or cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     return user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(seconds=JWT_EXPIRATION))
 
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+    to_encode.update({"exp": calendar.timegm(expire.utctimetuple())})
+    if JWT_ALGORITHM == "HS256":
+        encoded_jwt = _encode_hs256(to_encode)
     else:
-        expire = datetime.utcnow() + timedelta(seconds=JWT_EXPIRATION)
-
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
     return encoded_jwt, expire
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Validate token and get current user"""
+def _b64url_encode(data: bytes) -> str:
+    """Encode bytes as an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64url_decode(segment: str) -> bytes:
+    """Decode an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# The HS256 header never changes, so encode it once
+_HS256_HEADER_SEGMENT = _b64url_encode(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+
+
+def _encode_hs256(payload: dict) -> str:
+    """
+    Sign a payload as an HS256 token with the precomputed secret
+
+    Equivalent to jwt.encode for the claims issued here, serialized with orjson.
+    Like PyJWT, datetime exp/iat/nbf claims are written as integer NumericDates.
+    """
+    time_claims = {
+        claim: calendar.timegm(payload[claim].utctimetuple())
+        for claim in ("exp", "iat", "nbf")
+        if isinstance(payload.get(claim), datetime)
+    }
+    if time_claims:
+        payload = {**payload, **time_claims}
+
+    signing_input = f"{_HS256_HEADER_SEGMENT}.{_b64url_encode(orjson.dumps(payload))}"
+    signature = hmac.new(JWT_SECRET_BYTES, signing_input.encode(), hashlib.sha256).digest()
+
+    return f"{signing_input}.{_b64url_encode(signature)}"
+
+
+def _decode_hs256(token: str) -> dict:
+    """
+    Verify and decode an HS256 token with the precomputed secret
+
+    Equivalent to jwt.decode for the tokens issued here, without PyJWT's
+    per-call option handling and key preparation.
+
+    Raises:
+        jwt.PyJWTError: If the token is malformed, forged or expired
+    """
+    if token.count(".") != 2:
+        raise jwt.DecodeError("Not enough segments")
+
+    signing_input, _, signature_segment = token.rpartition(".")
+    header_segment, _, payload_segment = signing_input.partition(".")
+
+    try:
+        signature = _b64url_decode(signature_segment)
+        expected = hmac.new(JWT_SECRET_BYTES, signing_input.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        header = orjson.loads(_b64url_decode(header_segment))
+        payload = orjson.loads(_b64url_decode(payload_segment))
+    except (ValueError, binascii.Error):
+        raise jwt.DecodeError("Invalid token")
+
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+
+    now = time.time()
+
+    exp = payload.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+        if exp <= now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+    nbf = payload.get("nbf")
+    if nbf is not None:
+        if not isinstance(nbf, (int, float)) or isinstance(nbf, bool):
+            raise jwt.DecodeError("Not Before claim (nbf) must be an integer.")
+        if nbf > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+
+    return payload
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify and decode a JWT access token
+
+    Verified payloads are cached by token string for a short time; cache hits
+    only re-check the expiration. The returned payload must not be modified.
+
+    Raises:
+        jwt.PyJWTError: If the token is invalid or expired
+    """
+    payload = _jwt_cache.get(token)
+
+    if payload is None:
+        if JWT_ALGORITHM == "HS256":
+            payload = _decode_hs256(token)
+        else:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        _jwt_cache[token] = payload
+    elif "exp" in payload and payload["exp"] <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    return payload
+
+
+async def auth_context(request: Request) -> TokenData:
+    """
+    Authenticate the request from its Authorization header
+
+    The header is parsed and the token decoded once per request; the result is
+    stored on request.state.auth and reused by get_current_user and RoleChecker.
+
+    Raises:
+        HTTPException: If the header is missing or malformed, or the token is invalid
+    """
+    token_data = getattr(request.state, "auth", None)
+    if token_data is not None:
+        return token_data
+
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing authorization header",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication scheme",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -82,40 +228,46 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
 
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-
-        token_data = TokenData(
-            user_id=int(user_id),
-            username=payload.get("username"),
-            roles=payload.get("roles", []),
-            exp=datetime.fromtimestamp(payload.get("exp"))
-        )
-    except jwt.PyJWTError:
-        raise credentials_exception
-
-    if token_data.exp < datetime.utcnow():
+        payload = decode_access_token(token)
+    except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except jwt.PyJWTError:
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+
+    exp = payload.get("exp")
+    token_data = TokenData(
+        user_id=int(user_id),
+        username=payload.get("username"),
+        roles=payload.get("roles", []),
+        exp=datetime.utcfromtimestamp(exp) if exp is not None else None
+    )
+
+    request.state.auth = token_data
+    return token_data
 
+
+async def get_current_user(token_data: TokenData = Depends(auth_context)):
+    """Validate token and get current user"""
     return token_data
 
 
-async def get_current_active_user(current_user: TokenData = Depends(get_current_user)):
+async def get_current_active_user(
+        current_user: TokenData = Depends(get_current_user),
+        db=Depends(get_db)
+):
     """Get current active user"""
     from core.lms_core.users.crud import get_user
 
-    # Get database session
-    from infrastructure.databases.database_config import get_db
-    db = next(get_db())
-
     # Get user from database
-    user = await get_user(db, user_id=current_user.user_id)
+    user = get_user(db, user_id=current_user.user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -127,9 +279,10 @@ async def get_current_active_user(current_user: TokenData = Depends(get_current_
 
 def has_role(required_roles):
     """Check if user has required roles"""
+    required_roles = frozenset(required_roles)
 
     async def role_checker(current_user: TokenData = Depends(get_current_user)):
-        if not any(role in current_user.roles for role in required_roles):
+        if required_roles.isdisjoint(current_user.roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions",
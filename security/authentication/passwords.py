@@ -0,0 +1,36 @@
+# security/authentication/passwords.py
+from passlib.context import CryptContext
+
+# Password hashing (argon2id; existing bcrypt hashes are upgraded on login)
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1
+)
+
+
+def verify_password(plain_password, hashed_password):
+    """Verify password against hash"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password):
+    """Hash a password"""
+    return pwd_context.hash(password)
+
+
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    Verify a password and rehash it if it uses a deprecated scheme or cost
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Stored password hash
+
+    Returns:
+        Tuple of (valid, new_hash); new_hash is None unless the hash should be replaced
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
@@ -1,114 +1,61 @@
 # Authorization middleware for securing API endpoints
 from fastapi import HTTPException, Request, status
-import jwt
-import os
-import time
 from typing import List, Optional, Callable
 from functools import wraps
+import inspect
 
-# JWT Configuration
-JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
-JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+from security.authentication.auth import auth_context
 
 
 class RoleChecker:
     """Role checker middleware for protecting routes"""
 
     def __init__(self, allowed_roles: List[str]):
-        self.allowed_roles = allowed_roles
+        self.allowed_roles = frozenset(allowed_roles)
 
     async def __call__(self, request: Request):
-        # Extract token from Authorization header
-        authorization: str = request.headers.get("Authorization")
-        if not authorization:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Missing authorization header",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        # Authenticate once per request (shared with get_current_user)
+        token_data = await auth_context(request)
 
-        try:
-            scheme, token = authorization.split()
-            if scheme.lower() != "bearer":
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid authentication scheme",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-        except ValueError:
+        # Check if user has required roles
+        if self.allowed_roles.isdisjoint(token_data.roles):
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authorization header",
-                headers={"WWW-Authenticate": "Bearer"},
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions",
             )
 
-        # Validate token and check roles
-        try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-
-            # Check token expiration
-            if "exp" in payload and payload["exp"] < time.time():
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token expired",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-
-            # Check if user has required roles
-            user_roles = payload.get("roles", [])
-            if not any(role in user_roles for role in self.allowed_roles):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Insufficient permissions",
-                )
-
-            # Add user info to request state
-            request.state.user = {
-                "id": payload.get("sub"),
-                "username": payload.get("username"),
-                "roles": user_roles
-            }
-
-        except jwt.PyJWTError:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        # Add user info to request state
+        request.state.user = {
+            "id": token_data.user_id,
+            "username": token_data.username,
+            "roles": token_data.roles
+        }
 
         return True
 
 
 def requires_roles(roles: List[str]) -> Callable:
-    """Decorator for requiring specific roles to access an endpoint"""
+    """
+    Decorator for requiring specific roles to access an endpoint
 
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            request = None
-
-            # Find request object in args or kwargs
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
+    The endpoint must declare a `request: Request` parameter, which FastAPI
+    passes by name. Prefer `Depends(RoleChecker(roles))` for new endpoints.
+    """
 
-            if request is None:
-                request = kwargs.get("request")
+    checker = RoleChecker(roles)
 
-            if request is None:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Could not find request object",
-                )
+    def decorator(func: Callable) -> Callable:
+        if "request" not in inspect.signature(func).parameters:
+            raise TypeError(f"{func.__name__} must declare a 'request: Request' parameter to use requires_roles")
 
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
             # Check roles
-            checker = RoleChecker(roles)
-            await checker(request)
+            await checker(kwargs["request"])
 
             # Call original function
             return await func(*args, **kwargs)
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,15 @@
+# tests/api_config.py
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def base_url():
+    """Base URL for the running API, read on first use once conftest has loaded .env"""
+    return os.environ.get("API_URL", "http://localhost/api/v1")
+
+
+@lru_cache(maxsize=None)
+def files_url():
+    """Base URL for the files API, read on first use once conftest has loaded .env"""
+    return os.environ.get("FILES_API_URL", "http://localhost/api/files")
@@ -1,9 +1,23 @@
 # tests/conftest.py
 import pytest
+import pytest_asyncio
+import asyncio
+import logging
 import os
 import sys
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from types import SimpleNamespace
+from dotenv import load_dotenv
+import httpx
+import orjson
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from starlette.routing import request_response
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 
 # Add project root to path
@@ -11,82 +25,379 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Import models and database configuration
 from infrastructure.databases.database_config import Base
-from core.lms_core.users.models import User, Role
-from security.authentication.auth import get_password_hash
+from security.authentication.auth import create_access_token
+from core.lms_core.users.models import User, Role, user_roles as user_roles_table
+from api_config import base_url
+from token_cache import cache_token, get_cached_token
 
-# Create test database
-TEST_SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
+def pytest_configure(config):
+    # Load .env once per process (and once per xdist worker) instead of at each module import
+    load_dotenv()
 
-@pytest.fixture(scope="function")
-def db_session():
-    # Create in-memory SQLite database for tests
+    # Keep test and app logging at WARNING unless asked for, e.g. with --log-cli-level=INFO;
+    # configured before the app is imported, so its own basicConfig(level=INFO) is a no-op
+    logging.basicConfig(level=logging.WARNING)
+
+
+# In-memory test database, shared across the session through StaticPool
+TEST_SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+
+# Minimum bcrypt cost - tests never rely on hash strength
+test_pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+@lru_cache(maxsize=None)
+def get_password_hash(password):
+    """Hash a test password once per test run"""
+    return test_pwd_context.hash(password)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    # Make hashing done by the app itself (user creation, password reset) cheap as well;
+    # session-scoped so it is active before other session fixtures hash passwords
+    import security.authentication.passwords
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(security.authentication.passwords, "pwd_context", test_pwd_context)
+        yield
+
+
+@pytest.fixture(scope="session")
+def engine():
+    # Create the test database and schema once per test session
     engine = create_engine(
         TEST_SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
 
+    @event.listens_for(engine, "connect")
+    def configure_sqlite(dbapi_connection, connection_record):
+        # pysqlite does not emit BEGIN itself, which breaks SAVEPOINT handling
+        dbapi_connection.isolation_level = None
+
+        # Test data is throwaway, skip durability work
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
     # Create tables
     Base.metadata.create_all(bind=engine)
 
-    # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = TestingSessionLocal()
+    try:
+        yield engine
+    finally:
+        # Drop tables after the test session
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def seed_rows():
+    # Build the seed rows once per session; passwords are hashed here
+    roles = [
+        {"name": "admin", "description": "Administrator"},
+        {"name": "instructor", "description": "Teacher"},
+        {"name": "student", "description": "Student"},
+    ]
+
+    user_rows = [
+        {
+            "username": username,
+            "email": f"{email_name}@example.com",
+            "first_name": first_name,
+            "last_name": "User",
+            "hashed_password": get_password_hash(password),
+            "is_active": True,
+            "is_verified": True,
+        }
+        for username, email_name, first_name, password in (
+            ("admin_test", "admin", "Admin", "adminpass"),
+            ("teacher_test", "teacher", "Teacher", "teacherpass"),
+            ("student_test", "student", "Student", "studentpass"),
+        )
+    ]
+    user_roles = {"admin_test": "admin", "teacher_test": "instructor", "student_test": "student"}
+
+    return roles, user_rows, user_roles
+
+
+@pytest.fixture(scope="session")
+def seed_data(engine, seed_rows):
+    # Setup test data once with Core executemany inserts; each test rolls back its own changes
+    roles, user_rows, user_roles = seed_rows
+    roles_table = Role.__table__
+    users_table = User.__table__
+
+    with engine.begin() as connection:
+        role_ids = dict(connection.execute(
+            roles_table.insert().returning(roles_table.c.name, roles_table.c.id), roles
+        ).all())
+        user_ids = dict(connection.execute(
+            users_table.insert().returning(users_table.c.username, users_table.c.id), user_rows
+        ).all())
 
-    # Setup test data
-    setup_test_data(db)
+        connection.execute(user_roles_table.insert(), [
+            {"user_id": user_ids[username], "role_id": role_ids[role]}
+            for username, role in user_roles.items()
+        ])
+
+
+@pytest.fixture(scope="session")
+def db_connection(engine, seed_data):
+    # One connection and outer transaction for the whole session, opened after seeding
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
+
+
+@pytest.fixture(scope="function")
+def db_session(db_connection):
+    # Run each test inside a SAVEPOINT that is rolled back afterwards;
+    # commits made by the test only release a nested SAVEPOINT
+    savepoint = db_connection.begin_nested()
+    db = Session(bind=db_connection, autoflush=False, join_transaction_mode="create_savepoint")
 
     try:
         yield db
     finally:
         db.close()
-        # Drop tables after test
-        Base.metadata.drop_all(bind=engine)
+        savepoint.rollback()
 
 
-def setup_test_data(db):
-    # Create test roles
-    admin_role = Role(name="admin", description="Administrator")
-    instructor_role = Role(name="instructor", description="Teacher")
-    student_role = Role(name="student", description="Student")
-
-    db.add_all([admin_role, instructor_role, student_role])
-    db.commit()
-
-    # Create test users
-    admin_user = User(
-        username="admin_test",
-        email="admin@example.com",
-        first_name="Admin",
-        last_name="User",
-        hashed_password=get_password_hash("adminpass"),
-        is_active=True,
-        is_verified=True
-    )
-    admin_user.roles.append(admin_role)
-
-    instructor_user = User(
-        username="teacher_test",
-        email="teacher@example.com",
-        first_name="Teacher",
-        last_name="User",
-        hashed_password=get_password_hash("teacherpass"),
-        is_active=True,
-        is_verified=True
-    )
-    instructor_user.roles.append(instructor_role)
-
-    student_user = User(
-        username="student_test",
-        email="student@example.com",
-        first_name="Student",
-        last_name="User",
-        hashed_password=get_password_hash("studentpass"),
-        is_active=True,
-        is_verified=True
+def use_orjson_responses(app):
+    """
+    Serialize the app's JSON responses with orjson for the test session
+
+    Routes resolve their response class when they are added, so setting a default
+    afterwards has no effect; routes still on the default are switched and their
+    request handlers rebuilt instead.
+
+    Args:
+        app: FastAPI application
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and isinstance(route.response_class, DefaultPlaceholder):
+            route.response_class = ORJSONResponse
+            route.app = request_response(route.get_route_handler())
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One TestClient for the whole session, so the app's startup/shutdown run once
+    from core.lms_core.main import app
+
+    use_orjson_responses(app)
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_client(client, admin_token):
+    # Separate client carrying the admin token by default; the shared client stays unauthenticated
+    # (not entered with `with`, so the app's startup/shutdown do not run a second time)
+    admin_client = TestClient(client.app)
+    admin_client.headers.update({"Authorization": f"Bearer {admin_token}"})
+
+    try:
+        yield admin_client
+    finally:
+        admin_client.close()
+
+
+def _bearer_headers(user_id, username, role):
+    access_token, _ = create_access_token({"sub": str(user_id), "username": username, "roles": [role]})
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="session")
+def admin_token():
+    # Signed once per session for the seeded admin
+    access_token, _ = create_access_token({"sub": "1", "username": "admin_test", "roles": ["admin"]})
+    return access_token
+
+
+@pytest.fixture(scope="session")
+def instructor_headers():
+    # Signed once per session for the seeded instructor
+    return _bearer_headers(2, "teacher_test", "instructor")
+
+
+@pytest.fixture(scope="session")
+def student_headers():
+    # Signed once per session for the seeded student
+    return _bearer_headers(3, "student_test", "student")
+
+
+# Transient gateway errors from the running API are retried with exponential backoff
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.1
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Async transport that retries responses with a transient gateway error status"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(RETRY_TOTAL + 1):
+            response = await self.transport.handle_async_request(request)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == RETRY_TOTAL:
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** attempt)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# Login endpoint of the running API, relative to base_url()
+TOKEN_PATH = "/auth/token"
+
+# Users of the running API
+INSTRUCTOR = {
+    "username": "instructor_test",
+    "email": "instructor@example.com",
+    "password": "Secur3P@ssword!"
+}
+
+STUDENT = {
+    "username": "student_test",
+    "email": "student@example.com",
+    "password": "Secur3P@ssword!"
+}
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    # Module-scoped loop for the module-scoped async fixtures, on libuv where available
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            loop = uvloop.new_event_loop()
+        except ImportError:
+            loop = asyncio.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+
+    yield loop
+    loop.close()
+
+
+def make_api_client(**kwargs):
+    """
+    Create an async client for the running API
+
+    Requests reuse pooled keep-alive connections; connection failures and
+    gateway errors are retried.
+
+    Args:
+        kwargs: Extra httpx.AsyncClient arguments, e.g. default headers
+
+    Returns:
+        httpx.AsyncClient, to be used as an async context manager
+    """
+    transport = RetryTransport(httpx.AsyncHTTPTransport(
+        retries=RETRY_TOTAL,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=20)
+    ))
+    return httpx.AsyncClient(base_url=base_url(), transport=transport, **kwargs)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def api_client():
+    # Shared async client for the module, without default credentials
+    async with make_api_client() as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def state():
+    # Resources created against the running API, shared between modules in one process
+    return SimpleNamespace(course_id=None)
+
+
+# Existing course of the running API, used unless test_courses.py created one in this process
+COURSE_ID = 1  # Replace with an actual course ID from your system
+
+
+@pytest.fixture(scope="module")
+def course_id(state):
+    # test_courses.py overrides this with the course it creates
+    return state.course_id or COURSE_ID
+
+
+# Tokens issued in this process, by username
+_tokens = {}
+
+
+async def _login(client, credentials):
+    """
+    Get an access token for a test user of the running API
+
+    Args:
+        client: API client
+        credentials: Test user dict with username and password
+
+    Returns:
+        Access token, reused from this process or a previous run while still valid
+    """
+    username = credentials["username"]
+
+    token = _tokens.get(username) or get_cached_token(username, base_url())
+    if token:
+        _tokens[username] = token
+        return token
+
+    # Login
+    response = await client.post(
+        TOKEN_PATH,
+        data={
+            "username": username,
+            "password": credentials["password"]
+        },
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
     )
-    student_user.roles.append(student_role)
 
-    db.add_all([admin_user, instructor_user, student_user])
-    db.commit()
\ No newline at end of file
+    assert response.status_code == 200, f"Login failed for {username}: {response.status_code}"
+
+    token = orjson.loads(response.content)["access_token"]
+    cache_token(username, base_url(), token)
+    _tokens[username] = token
+    return token
+
+
+# Authorization headers are built once per role and passed as the same dict on every call
+@pytest_asyncio.fixture(scope="module")
+async def instructor_auth(api_client):
+    return {"Authorization": f"Bearer {await _login(api_client, INSTRUCTOR)}"}
+
+
+@pytest_asyncio.fixture(scope="module")
+async def student_auth(api_client):
+    return {"Authorization": f"Bearer {await _login(api_client, STUDENT)}"}
+
+
+@pytest_asyncio.fixture(scope="module")
+async def instructor_client(instructor_auth):
+    # Separate client sending the instructor token by default, for modules that only act as the instructor;
+    # api_client stays unauthenticated
+    async with make_api_client(headers=instructor_auth) as client:
+        yield client
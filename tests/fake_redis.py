@@ -0,0 +1,169 @@
+# tests/fake_redis.py
+import redis
+
+
+class FakeAsyncRedis:
+    """
+    In-memory stand-in for the redis.asyncio client used by the notification service
+
+    Covers the commands the service issues, with decode_responses=True semantics.
+    Setting `fail` makes every command raise redis.ConnectionError.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expiries = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise redis.ConnectionError("Redis unavailable")
+
+    async def set(self, key, value, nx=False, ex=None):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        if ex is not None:
+            self.expiries[key] = ex
+        return True
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def delete(self, *keys):
+        self._check()
+        deleted = 0
+        for key in keys:
+            deleted += self.data.pop(key, None) is not None
+            self.expiries.pop(key, None)
+        return deleted
+
+    async def expire(self, key, seconds):
+        self._check()
+        if key not in self.data:
+            return False
+        self.expiries[key] = seconds
+        return True
+
+    async def lpush(self, key, *values):
+        self._check()
+        items = self.data.setdefault(key, [])
+        for value in values:
+            items.insert(0, str(value))
+        return len(items)
+
+    async def rpush(self, key, *values):
+        self._check()
+        items = self.data.setdefault(key, [])
+        items.extend(str(value) for value in values)
+        return len(items)
+
+    async def lrange(self, key, start, end):
+        self._check()
+        items = self.data.get(key, [])
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    async def sadd(self, key, *members):
+        self._check()
+        items = self.data.setdefault(key, set())
+        before = len(items)
+        items.update(str(member) for member in members)
+        return len(items) - before
+
+    async def srem(self, key, *members):
+        self._check()
+        items = self.data.get(key, set())
+        before = len(items)
+        items.difference_update(str(member) for member in members)
+        if not items:
+            self.data.pop(key, None)
+        return before - len(items)
+
+    async def smembers(self, key):
+        self._check()
+        return set(self.data.get(key, set()))
+
+    async def scard(self, key):
+        self._check()
+        return len(self.data.get(key, set()))
+
+    async def sunion(self, keys):
+        self._check()
+        return set().union(*(self.data.get(key, set()) for key in keys))
+
+    async def sunionstore(self, destination, keys):
+        union = await self.sunion(keys)
+        self.data[destination] = union
+        self.expiries.pop(destination, None)
+        return len(union)
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        self._check()
+        items = self.data.setdefault(key, {})
+        if field is not None:
+            items[str(field)] = str(value)
+        for field, value in (mapping or {}).items():
+            items[str(field)] = str(value)
+        return len(items)
+
+    async def hgetall(self, key):
+        self._check()
+        return dict(self.data.get(key, {}))
+
+    async def zadd(self, key, mapping):
+        self._check()
+        self.data.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zrem(self, key, *members):
+        self._check()
+        items = self.data.get(key, {})
+        return sum(items.pop(member, None) is not None for member in members)
+
+    async def zrange(self, key, start, end):
+        self._check()
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        members = members[start:] if end == -1 else members[start:end + 1]
+        return [member for member, _ in members]
+
+    async def zremrangebyscore(self, key, min_score, max_score):
+        self._check()
+        low = float(min_score)
+        high = float(max_score)
+        items = self.data.get(key, {})
+        removed = [member for member, score in items.items() if low <= score <= high]
+        for member in removed:
+            del items[member]
+        return len(removed)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffers commands and runs them in order on execute(), like a MULTI/EXEC pipeline"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def buffer(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return buffer
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
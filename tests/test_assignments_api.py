@@ -1,24 +1,9 @@
 # tests/test_assignments_api.py
 import pytest
-from fastapi.testclient import TestClient
 from datetime import datetime, timedelta
 
-from core.lms_core.main import app
-from security.authentication.auth import create_access_token
-
-# Setup test client
-client = TestClient(app)
-
-
-def test_create_assignment(db_session):
-    # Create test token for instructor
-    instructor_token_data = {
-        "sub": "2",  # instructor_user.id
-        "username": "teacher_test",
-        "roles": ["instructor"]
-    }
-    access_token, _ = create_access_token(instructor_token_data)
 
+def test_create_assignment(db_session, client, instructor_headers):
     # Test create assignment endpoint
     assignment_data = {
         "title": "Test Assignment",
@@ -32,7 +17,7 @@ def test_create_assignment(db_session):
     response = client.post(
         "/api/v1/assignments/",
         json=assignment_data,
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=instructor_headers
     )
 
     # Assert response
@@ -43,19 +28,11 @@ def test_create_assignment(db_session):
     assert created_assignment["points_possible"] == 100
 
 
-def test_get_assignments_for_course(db_session):
-    # Create test token for student
-    student_token_data = {
-        "sub": "3",  # student_user.id
-        "username": "student_test",
-        "roles": ["student"]
-    }
-    access_token, _ = create_access_token(student_token_data)
-
+def test_get_assignments_for_course(db_session, client, student_headers):
     # Test get assignments endpoint
     response = client.get(
         "/api/v1/courses/1/assignments",
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=student_headers
     )
 
     # Assert response
@@ -67,19 +44,11 @@ def test_get_assignments_for_course(db_session):
         assert "due_date" in assignments[0]
 
 
-def test_submit_assignment(db_session):
-    # Create test token for student
-    student_token_data = {
-        "sub": "3",  # student_user.id
-        "username": "student_test",
-        "roles": ["student"]
-    }
-    access_token, _ = create_access_token(student_token_data)
-
+def test_submit_assignment(db_session, client, student_headers):
     # First, get an assignment to submit to
     response = client.get(
         "/api/v1/courses/1/assignments",
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=student_headers
     )
 
     assert response.status_code == 200
@@ -99,7 +68,7 @@ def test_submit_assignment(db_session):
     response = client.post(
         f"/api/v1/assignments/{assignment_id}/submit",
         json=submission_data,
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=student_headers
     )
 
     # Assert response
@@ -109,19 +78,11 @@ def test_submit_assignment(db_session):
     assert submission["submission_text"] == "This is my assignment submission for testing."
 
 
-def test_get_submission(db_session):
-    # Create test token for instructor
-    instructor_token_data = {
-        "sub": "2",  # instructor_user.id
-        "username": "teacher_test",
-        "roles": ["instructor"]
-    }
-    access_token, _ = create_access_token(instructor_token_data)
-
+def test_get_submission(db_session, client, instructor_headers):
     # Test get submission endpoint - we assume a submission with ID 1 exists
     response = client.get(
         "/api/v1/grading/submissions/1",
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=instructor_headers
     )
 
     # If the submission doesn't exist, this test might need to create one first
@@ -136,15 +97,7 @@ def test_get_submission(db_session):
     assert "submission_text" in submission
 
 
-def test_grade_submission(db_session):
-    # Create test token for instructor
-    instructor_token_data = {
-        "sub": "2",  # instructor_user.id
-        "username": "teacher_test",
-        "roles": ["instructor"]
-    }
-    access_token, _ = create_access_token(instructor_token_data)
-
+def test_grade_submission(db_session, client, instructor_headers):
     # We assume a submission with ID 1 exists
     submission_id = 1
 
@@ -157,7 +110,7 @@ def test_grade_submission(db_session):
     response = client.post(
         f"/api/v1/grading/submissions/{submission_id}/grade",
         json=grade_data,
-        headers={"Authorization": f"Bearer {access_token}"}
+        headers=instructor_headers
     )
 
     # If the submission doesn't exist, this test might need to create one first
@@ -1,109 +1,41 @@
 # tests/test_auth.py
+import asyncio
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-# Import our app and models
-from core.lms_core.main import app
-from infrastructure.databases.database_config import Base, get_db
-from core.lms_core.users.models import User, Role
-from core.lms_core.auth.auth import get_password_hash
-
-# Setup test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create test client
-client = TestClient(app)
+from passlib.hash import bcrypt
 
+import core.lms_core.auth.auth
+import core.lms_core.auth.auth_service
+import security.authentication.auth
+from core.lms_core.users.models import User
+from infrastructure.databases.database_config import get_db
+from security.authentication import passwords
 
-@pytest.fixture(scope="function")
-def test_db():
-    # Create the database tables
-    Base.metadata.create_all(bind=engine)
-
-    # Create a test session
-    db = TestingSessionLocal()
+# The production argon2/bcrypt context, captured at collection time before
+# fast_password_hashing swaps in the bcrypt-only test context
+PRODUCTION_PWD_CONTEXT = passwords.pwd_context
 
-    # Create test data
-    create_test_data(db)
 
-    # Override get_db dependency
+@pytest.fixture(scope="function")
+def test_db(client, db_session):
+    # Serve the app from the shared test database; each test rolls back its own SAVEPOINT
     def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-
-    yield db
-
-    # Cleanup after test
-    Base.metadata.drop_all(bind=engine)
+        yield db_session
 
+    client.app.dependency_overrides[get_db] = override_get_db
 
-def create_test_data(db):
-    # Create test roles
-    admin_role = Role(name="admin", description="Administrator")
-    instructor_role = Role(name="instructor", description="Teacher")
-    student_role = Role(name="student", description="Student")
-
-    db.add_all([admin_role, instructor_role, student_role])
-    db.commit()
-
-    # Create test users
-    test_admin = User(
-        username="test_admin",
-        email="test_admin@example.com",
-        first_name="Test",
-        last_name="Admin",
-        hashed_password=get_password_hash("testadminpass"),
-        is_active=True,
-        is_verified=True
-    )
-    test_admin.roles.append(admin_role)
-
-    test_instructor = User(
-        username="test_instructor",
-        email="test_instructor@example.com",
-        first_name="Test",
-        last_name="Instructor",
-        hashed_password=get_password_hash("testinstructorpass"),
-        is_active=True,
-        is_verified=True
-    )
-    test_instructor.roles.append(instructor_role)
-
-    test_student = User(
-        username="test_student",
-        email="test_student@example.com",
-        first_name="Test",
-        last_name="Student",
-        hashed_password=get_password_hash("teststudentpass"),
-        is_active=True,
-        is_verified=True
-    )
-    test_student.roles.append(student_role)
-
-    db.add_all([test_admin, test_instructor, test_student])
-    db.commit()
+    try:
+        yield db_session
+    finally:
+        client.app.dependency_overrides.pop(get_db, None)
 
 
-def test_login(test_db):
+def test_login(client, test_db):
     # Test valid login
     response = client.post(
         "/api/v1/auth/token",
         data={
-            "username": "test_admin",
-            "password": "testadminpass"
+            "username": "admin_test",
+            "password": "adminpass"
         },
         headers={"Content-Type": "application/x-www-form-urlencoded"}
     )
@@ -111,14 +43,14 @@ def test_login(test_db):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
-    assert data["username"] == "test_admin"
+    assert data["username"] == "admin_test"
     assert "admin" in data["roles"]
 
     # Test invalid login
     response = client.post(
         "/api/v1/auth/token",
         data={
-            "username": "test_admin",
+            "username": "admin_test",
             "password": "wrongpassword"
         },
         headers={"Content-Type": "application/x-www-form-urlencoded"}
@@ -127,13 +59,48 @@ def test_login(test_db):
     assert response.status_code == 401
 
 
-def test_password_reset_request(test_db):
-    # Test password reset request
+def test_password_reset_request(client, test_db, seed_rows):
+    # Test password reset request for the seeded admin
+    _, user_rows, _ = seed_rows
+    admin_email = next(row["email"] for row in user_rows if row["username"] == "admin_test")
+
     response = client.post(
         "/api/v1/auth/request-password-reset",
-        json={"email": "test_admin@example.com"}
+        json={"email": admin_email}
     )
 
     assert response.status_code == 200
     data = response.json()
-    assert "message" in data
\ No newline at end of file
+    assert "message" in data
+
+
+@pytest.mark.parametrize("authenticate_user", [
+    core.lms_core.auth.auth.authenticate_user,
+    core.lms_core.auth.auth_service.authenticate_user,
+    security.authentication.auth.authenticate_user,
+])
+def test_login_upgrades_bcrypt_hash(db_session, monkeypatch, authenticate_user):
+    monkeypatch.setattr(passwords, "pwd_context", PRODUCTION_PWD_CONTEXT)
+
+    # A user whose password was stored before the switch to argon2
+    user = User(
+        username="bcrypt_user",
+        email="bcrypt_user@example.com",
+        first_name="Bcrypt",
+        last_name="User",
+        hashed_password=bcrypt.using(rounds=4).hash("bcryptpass"),
+        is_active=True,
+        is_verified=True
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    result = authenticate_user(db_session, "bcrypt_user", "bcryptpass")
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+
+    assert result
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$argon2id$")
+    assert passwords.verify_password("bcryptpass", user.hashed_password)
+    assert not passwords.verify_and_update_password("bcryptpass", user.hashed_password)[1]
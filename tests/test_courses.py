@@ -1,71 +1,35 @@
 # tests/test_courses.py
-import requests
-import json
+import asyncio
+import itertools
+import logging
+import orjson
 import time
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Base URL for API
-BASE_URL = os.getenv("API_URL", "http://localhost/api/v1")
-
-# Test data
-TEST_USER = {
-    "username": "instructor_test",
-    "email": "instructor@example.com",
-    "password": "Secur3P@ssword!"
-}
-
-# Global variables to store tokens and IDs
-access_token = None
-course_id = None
-module_id = None
-content_id = None
-
-
-def login():
-    global access_token
-
-    print("\n--- Logging in ---")
-
-    # Login
-    response = requests.post(
-        f"{BASE_URL}/auth/token",
-        data={
-            "username": TEST_USER["username"],
-            "password": TEST_USER["password"]
-        },
-        headers={
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-    )
+import pytest
+import pytest_asyncio
+
+# Initialize logging
+logger = logging.getLogger(__name__)
 
-    if response.status_code == 200:
-        data = response.json()
-        access_token = data["access_token"]
-        print(f"Login successful, token: {access_token[:10]}...")
-        return True
-    else:
-        print(f"Login failed: {response.status_code}")
-        print(response.json())
-        return False
+# Unique suffixes for created titles and codes: one timestamp per run plus a counter
+RUN_ID = int(time.time())
+_counter = itertools.count()
 
+# Static API paths; paths with IDs are built once the IDs exist
+COURSES_PATH = "/courses/"
+ENROLL_PATH = "/courses/enroll"
 
-def test_create_course():
-    global course_id
+# Per-request headers for JSON bodies; the bearer token is a default header of instructor_client
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-    print("\n--- Testing Course Creation ---")
+pytestmark = [pytest.mark.asyncio, pytest.mark.integration]
 
-    if not access_token:
-        print("No access token, skipping test")
-        return False
 
+@pytest_asyncio.fixture(scope="module")
+async def course_response(instructor_client):
     # Create a course
     course_data = {
-        "title": f"Test Course {int(time.time())}",
-        "code": f"TEST{int(time.time())}",
+        "title": f"Test Course {RUN_ID}-{next(_counter)}",
+        "code": f"TEST{RUN_ID}-{next(_counter)}",
         "description": "This is a test course created by the testing script",
         "start_date": "2023-09-01T00:00:00Z",
         "end_date": "2023-12-31T23:59:59Z",
@@ -74,263 +38,173 @@ def test_create_course():
         "instructor_id": 2  # Assuming instructor ID is 2, adjust as needed
     }
 
-    response = requests.post(
-        f"{BASE_URL}/courses/",
-        json=course_data,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+    # Request bodies are serialized with orjson straight to bytes and sent as-is
+    return await instructor_client.post(
+        COURSES_PATH,
+        content=orjson.dumps(course_data),
+        headers=JSON_HEADERS
     )
 
-    print(f"Create Course Response: {response.status_code}")
 
-    if response.status_code == 201:
-        data = response.json()
-        course_id = data["id"]
-        print(f"Course created with ID: {course_id}")
-        print(data)
-        print("Course creation test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Course creation test failed!")
-        return False
+@pytest.fixture(scope="module")
+def course_id(course_response, state):
+    if course_response.status_code != 201:
+        pytest.skip("No course was created")
+    course_id = orjson.loads(course_response.content)["id"]
+    logger.info("Course created with ID: %s", course_id)
 
+    # Later modules in this process reuse the course instead of a fixed ID
+    state.course_id = course_id
+    return course_id
 
-def test_get_courses():
-    print("\n--- Testing Get Courses ---")
 
-    if not access_token:
-        print("No access token, skipping test")
-        return False
+@pytest_asyncio.fixture(scope="module")
+async def module_response(instructor_client, course_id):
+    # Create a module
+    module_data = {
+        "title": f"Test Module {RUN_ID}-{next(_counter)}",
+        "description": "This is a test module created by the testing script",
+        "position": 1,
+        "is_published": True
+    }
 
-    # Get all courses
-    response = requests.get(
-        f"{BASE_URL}/courses/",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+    return await instructor_client.post(
+        f"/courses/{course_id}/modules",
+        content=orjson.dumps(module_data),
+        headers=JSON_HEADERS
     )
 
-    print(f"Get Courses Response: {response.status_code}")
-
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Found {len(data)} courses")
-        print("Get courses test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Get courses test failed!")
-        return False
 
+@pytest.fixture(scope="module")
+def module_id(module_response):
+    if module_response.status_code != 201:
+        pytest.skip("No module was created")
+    module_id = orjson.loads(module_response.content)["id"]
+    logger.info("Module created with ID: %s", module_id)
+    return module_id
 
-def test_get_course_details():
-    print("\n--- Testing Get Course Details ---")
 
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
+@pytest_asyncio.fixture(scope="module")
+async def content_response(instructor_client, module_id):
+    # Create content item
+    content_data = {
+        "title": f"Test Content {RUN_ID}-{next(_counter)}",
+        "content_type": "text",
+        "content": "This is a test content item created by the testing script",
+        "position": 1,
+        "is_published": True,
+        "module_id": module_id
+    }
 
-    # Get course details
-    response = requests.get(
-        f"{BASE_URL}/courses/{course_id}",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+    return await instructor_client.post(
+        f"/courses/modules/{module_id}/content",
+        content=orjson.dumps(content_data),
+        headers=JSON_HEADERS
     )
 
-    print(f"Get Course Details Response: {response.status_code}")
 
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Course details: {data['title']}")
-        print("Get course details test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Get course details test failed!")
-        return False
+@pytest_asyncio.fixture(scope="module")
+async def course_update_and_details(instructor_client, course_id):
+    # Update course
+    update_data = {
+        "description": f"Updated description {RUN_ID}-{next(_counter)}"
+    }
 
+    # Both requests only need the course ID, so they are sent together;
+    # the details check reads the title, which the update does not change
+    course_path = f"{COURSES_PATH}{course_id}"
+    return await asyncio.gather(
+        instructor_client.put(
+            course_path,
+            content=orjson.dumps(update_data),
+            headers=JSON_HEADERS
+        ),
+        instructor_client.get(
+            course_path
+        )
+    )
 
-def test_create_module():
-    global module_id
 
-    print("\n--- Testing Module Creation ---")
+async def test_create_course(course_response):
+    logger.info("Create Course Response: %s", course_response.status_code)
 
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
+    assert course_response.status_code == 201, f"Course creation failed: {course_response.text[:500]}"
 
-    # Create a module
-    module_data = {
-        "title": f"Test Module {int(time.time())}",
-        "description": "This is a test module created by the testing script",
-        "position": 1,
-        "is_published": True
-    }
 
-    response = requests.post(
-        f"{BASE_URL}/courses/{course_id}/modules",
-        json=module_data,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+async def test_get_courses(instructor_client):
+    # Get all courses
+    response = await instructor_client.get(
+        COURSES_PATH
     )
 
-    print(f"Create Module Response: {response.status_code}")
+    logger.info("Get Courses Response: %s", response.status_code)
 
-    if response.status_code == 201:
-        data = response.json()
-        module_id = data["id"]
-        print(f"Module created with ID: {module_id}")
-        print(data)
-        print("Module creation test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Module creation test failed!")
-        return False
+    assert response.status_code == 200, f"Get courses failed: {response.text[:500]}"
 
+    logger.info("Found %s courses", len(orjson.loads(response.content)))
 
-def test_get_modules():
-    print("\n--- Testing Get Modules ---")
 
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
+async def test_get_course_details(course_update_and_details):
+    _, response = course_update_and_details
 
-    # Get all modules for a course
-    response = requests.get(
-        f"{BASE_URL}/courses/{course_id}/modules",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
-
-    print(f"Get Modules Response: {response.status_code}")
+    logger.info("Get Course Details Response: %s", response.status_code)
 
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Found {len(data)} modules")
-        print("Get modules test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Get modules test failed!")
-        return False
+    assert response.status_code == 200, f"Get course details failed: {response.text[:500]}"
 
+    logger.info("Course details: %s", orjson.loads(response.content)["title"])
 
-def test_create_content():
-    global content_id
 
-    print("\n--- Testing Content Creation ---")
+async def test_create_module(module_response):
+    logger.info("Create Module Response: %s", module_response.status_code)
 
-    if not access_token or not module_id:
-        print("No access token or module ID, skipping test")
-        return False
+    assert module_response.status_code == 201, f"Module creation failed: {module_response.text[:500]}"
 
-    # Create content item
-    content_data = {
-        "title": f"Test Content {int(time.time())}",
-        "content_type": "text",
-        "content": "This is a test content item created by the testing script",
-        "position": 1,
-        "is_published": True,
-        "module_id": module_id
-    }
 
-    response = requests.post(
-        f"{BASE_URL}/courses/modules/{module_id}/content",
-        json=content_data,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+async def test_get_modules(instructor_client, course_id):
+    # Get all modules for a course
+    response = await instructor_client.get(
+        f"/courses/{course_id}/modules"
     )
 
-    print(f"Create Content Response: {response.status_code}")
+    logger.info("Get Modules Response: %s", response.status_code)
 
-    if response.status_code == 201:
-        data = response.json()
-        content_id = data["id"]
-        print(f"Content created with ID: {content_id}")
-        print(data)
-        print("Content creation test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Content creation test failed!")
-        return False
+    assert response.status_code == 200, f"Get modules failed: {response.text[:500]}"
 
+    logger.info("Found %s modules", len(orjson.loads(response.content)))
 
-def test_get_content():
-    print("\n--- Testing Get Content ---")
 
-    if not access_token or not module_id:
-        print("No access token or module ID, skipping test")
-        return False
+async def test_create_content(content_response):
+    logger.info("Create Content Response: %s", content_response.status_code)
 
-    # Get all content for a module
-    response = requests.get(
-        f"{BASE_URL}/courses/modules/{module_id}/content",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
+    assert content_response.status_code == 201, f"Content creation failed: {content_response.text[:500]}"
 
-    print(f"Get Content Response: {response.status_code}")
+    logger.info("Content created with ID: %s", orjson.loads(content_response.content)["id"])
 
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Found {len(data)} content items")
-        print("Get content test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Get content test failed!")
-        return False
 
+async def test_get_content(instructor_client, module_id):
+    # Get all content for a module
+    response = await instructor_client.get(
+        f"/courses/modules/{module_id}/content"
+    )
 
-def test_update_course():
-    print("\n--- Testing Course Update ---")
+    logger.info("Get Content Response: %s", response.status_code)
 
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
+    assert response.status_code == 200, f"Get content failed: {response.text[:500]}"
 
-    # Update course
-    update_data = {
-        "description": f"Updated description at {time.time()}"
-    }
+    logger.info("Found %s content items", len(orjson.loads(response.content)))
 
-    response = requests.put(
-        f"{BASE_URL}/courses/{course_id}",
-        json=update_data,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
 
-    print(f"Update Course Response: {response.status_code}")
+async def test_update_course(course_update_and_details):
+    response, _ = course_update_and_details
 
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Course updated: {data['description']}")
-        print("Course update test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Course update test failed!")
-        return False
+    logger.info("Update Course Response: %s", response.status_code)
 
+    assert response.status_code == 200, f"Course update failed: {response.text[:500]}"
 
-def test_enroll_student():
-    print("\n--- Testing Student Enrollment ---")
+    logger.info("Course updated: %s", orjson.loads(response.content)["description"])
 
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
 
+async def test_enroll_student(instructor_client, course_id):
     # Enroll a student
     enrollment_data = {
         "student_id": 3,  # Assuming student ID is 3, adjust as needed
@@ -338,92 +212,27 @@ def test_enroll_student():
         "is_active": True
     }
 
-    response = requests.post(
-        f"{BASE_URL}/courses/enroll",
-        json=enrollment_data,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+    response = await instructor_client.post(
+        ENROLL_PATH,
+        content=orjson.dumps(enrollment_data),
+        headers=JSON_HEADERS
     )
 
-    print(f"Enroll Student Response: {response.status_code}")
+    logger.info("Enroll Student Response: %s", response.status_code)
 
-    if response.status_code == 201:
-        data = response.json()
-        print(f"Enrollment created with ID: {data['id']}")
-        print(data)
-        print("Student enrollment test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Student enrollment test failed!")
-        return False
+    assert response.status_code == 201, f"Student enrollment failed: {response.text[:500]}"
 
+    logger.info("Enrollment created with ID: %s", orjson.loads(response.content)["id"])
 
-def test_get_enrollments():
-    print("\n--- Testing Get Enrollments ---")
-
-    if not access_token or not course_id:
-        print("No access token or course ID, skipping test")
-        return False
 
+async def test_get_enrollments(instructor_client, course_id):
     # Get enrollments for a course
-    response = requests.get(
-        f"{BASE_URL}/courses/{course_id}/enrollments",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+    response = await instructor_client.get(
+        f"/courses/{course_id}/enrollments"
     )
 
-    print(f"Get Enrollments Response: {response.status_code}")
-
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Found {len(data)} enrollments")
-        print("Get enrollments test passed!")
-        return True
-    else:
-        print(response.json())
-        print("Get enrollments test failed!")
-        return False
-
-
-def run_all_tests():
-    print("=== Starting Course Management Tests ===")
-
-    # Login first
-    if not login():
-        print("Login failed, aborting tests")
-        return
-
-    tests = [
-        test_create_course,
-        test_get_courses,
-        test_get_course_details,
-        test_create_module,
-        test_get_modules,
-        test_create_content,
-        test_get_content,
-        test_update_course,
-        test_enroll_student,
-        test_get_enrollments
-    ]
-
-    results = []
-
-    for test in tests:
-        try:
-            result = test()
-            results.append((test.__name__, result))
-        except Exception as e:
-            print(f"Error in {test.__name__}: {str(e)}")
-            results.append((test.__name__, False))
-
-    print("\n=== Course Management Test Results ===")
-    for name, result in results:
-        status = "PASSED" if result else "FAILED"
-        print(f"{name}: {status}")
-
-
-if __name__ == "__main__":
-    run_all_tests()
\ No newline at end of file
+    logger.info("Get Enrollments Response: %s", response.status_code)
+
+    assert response.status_code == 200, f"Get enrollments failed: {response.text[:500]}"
+
+    logger.info("Found %s enrollments", len(orjson.loads(response.content)))
@@ -1,246 +1,137 @@
 # tests/test_files.py
-import requests
-import json
+import io
+import logging
+import orjson
+import tempfile
 import time
 import os
-import tempfile
-from dotenv import load_dotenv
+import pytest
+import pytest_asyncio
 
-# Load environment variables
-load_dotenv()
+from api_config import files_url
 
-# Base URL for API
-BASE_URL = os.getenv("API_URL", "http://localhost/api/v1")
-FILES_API_URL = os.getenv("FILES_API_URL", "http://localhost/api/files")
+# Initialize logging
+logger = logging.getLogger(__name__)
 
-# Test data
-TEST_USER = {
-    "username": "instructor_test",
-    "email": "instructor@example.com",
-    "password": "Secur3P@ssword!"
-}
 
-# Global variables to store tokens and IDs
-access_token = None
-course_id = None  # You might need to set this to an existing course ID
-file_id = None
+# Read size when streaming downloads
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
+# Size of the file used by the slow upload test
+LARGE_FILE_SIZE = 8 * 1024 * 1024
 
-def login():
-    global access_token
+pytestmark = [pytest.mark.asyncio, pytest.mark.integration]
 
-    print("\n--- Logging in ---")
 
-    # Login
-    response = requests.post(
-        f"{BASE_URL}/auth/token",
-        data={
-            "username": TEST_USER["username"],
-            "password": TEST_USER["password"]
-        },
-        headers={
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-    )
-
-    if response.status_code == 200:
-        data = response.json()
-        access_token = data["access_token"]
-        print(f"Login successful, token: {access_token[:10]}...")
-        return True
-    else:
-        print(f"Login failed: {response.status_code}")
-        print(response.json())
-        return False
-
-
-def create_test_file():
-    # Create a temporary text file for testing
-    temp_file = tempfile.NamedTemporaryFile(suffix=".txt", delete=False)
+def create_test_content():
+    # Content of the small text file used for testing
     content = f"This is a test file created at {time.time()}\n"
     content += "Used for testing the file upload API\n"
     content += "Lorem ipsum dolor sit amet, consectetur adipiscing elit."
 
-    temp_file.write(content.encode("utf-8"))
-    temp_file.close()
-
-    return temp_file.name
+    return content.encode("utf-8")
 
 
-def test_upload_file():
-    global file_id
-
-    print("\n--- Testing File Upload ---")
-
-    if not access_token:
-        print("No access token, skipping test")
-        return False
-
-    # Create a test file
-    test_file_path = create_test_file()
-    try:
-        # Prepare file upload
-        files = {
-            'file': (os.path.basename(test_file_path), open(test_file_path, 'rb'), 'text/plain')
-        }
-
-        data = {
+@pytest_asyncio.fixture(scope="module")
+async def upload_response(instructor_client, course_id):
+    # Upload the small test file straight from memory, nothing is written to disk
+    return await instructor_client.post(
+        f"{files_url()}/upload",
+        files={'file': ('test.txt', io.BytesIO(create_test_content()), 'text/plain')},
+        data={
             'description': 'Test file upload',
-            'course_id': course_id if course_id else None,
+            'course_id': str(course_id),
             'is_public': 'true'
         }
+    )
 
-        # Upload file
-        response = requests.post(
-            f"{FILES_API_URL}/upload",
-            files=files,
-            data=data,
-            headers={
-                "Authorization": f"Bearer {access_token}"
-            }
-        )
-
-        print(f"Upload File Response: {response.status_code}")
-
-        if response.status_code == 200:
-            data = response.json()
-            file_id = data["id"]
-            print(f"File uploaded with ID: {file_id}")
-            print(data)
-            print("File upload test passed!")
-            return True
-        else:
-            print(response.json() if response.text else response.text)
-            print("File upload test failed!")
-            return False
 
-    finally:
-        # Clean up the test file
-        os.unlink(test_file_path)
+@pytest.fixture(scope="module")
+def file_id(upload_response):
+    if upload_response.status_code != 200:
+        pytest.skip("No file was uploaded")
+    file_id = orjson.loads(upload_response.content)["id"]
+    logger.info("File uploaded with ID: %s", file_id)
+    return file_id
 
 
-def test_list_files():
-    print("\n--- Testing List Files ---")
+async def test_upload_file(upload_response):
+    logger.info("Upload File Response: %s", upload_response.status_code)
 
-    if not access_token:
-        print("No access token, skipping test")
-        return False
+    assert upload_response.status_code == 200, f"File upload failed: {upload_response.text[:500]}"
 
-    # List files
-    params = {}
-    if course_id:
-        params['course_id'] = course_id
-
-    response = requests.get(
-        f"{FILES_API_URL}",
-        params=params,
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
 
-    print(f"List Files Response: {response.status_code}")
-
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Found {len(data)} files")
-        if data:
-            print(f"First file: {data[0]['original_filename']}")
-        print("List files test passed!")
-        return True
-    else:
-        print(response.json() if response.text else response.text)
-        print("List files test failed!")
-        return False
-
-
-def test_download_file():
-    print("\n--- Testing File Download ---")
-
-    if not access_token or not file_id:
-        print("No access token or file ID, skipping test")
-        return False
-
-    # Download file
-    response = requests.get(
-        f"{FILES_API_URL}/download/{file_id}",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
+@pytest.mark.slow
+async def test_upload_large_file(instructor_client, course_id):
+    # Larger uploads go through a file on disk; httpx streams the open handle in chunks
+    # instead of reading it into memory
+    with tempfile.NamedTemporaryFile(suffix=".txt") as temp_file:
+        line = b"Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+        temp_file.write(line * (LARGE_FILE_SIZE // len(line)))
+        temp_file.flush()
+        temp_file.seek(0)
 
-    print(f"Download File Response: {response.status_code}")
+        response = await instructor_client.post(
+            f"{files_url()}/upload",
+            files={'file': (os.path.basename(temp_file.name), temp_file, 'text/plain')},
+            data={
+                'description': 'Large test file upload',
+                'course_id': str(course_id),
+                'is_public': 'true'
+            }
+        )
 
-    if response.status_code == 200:
-        print(f"File downloaded, content length: {len(response.content)} bytes")
-        print("File download test passed!")
-        return True
-    else:
-        print(response.json() if response.text else response.text)
-        print("File download test failed!")
-        return False
+    logger.info("Upload Large File Response: %s", response.status_code)
 
+    assert response.status_code == 200, f"Large file upload failed: {response.text[:500]}"
 
-def test_delete_file():
-    print("\n--- Testing File Deletion ---")
+    # Remove the uploaded copy again
+    await instructor_client.delete(
+        f"{files_url()}/{orjson.loads(response.content)['id']}"
+    )
 
-    if not access_token or not file_id:
-        print("No access token or file ID, skipping test")
-        return False
 
-    # Delete file
-    response = requests.delete(
-        f"{FILES_API_URL}/{file_id}",
-        headers={
-            "Authorization": f"Bearer {access_token}"
-        }
+async def test_list_files(instructor_client, course_id):
+    # List files
+    response = await instructor_client.get(
+        files_url(),
+        params={'course_id': course_id}
     )
 
-    print(f"Delete File Response: {response.status_code}")
+    logger.info("List Files Response: %s", response.status_code)
 
-    if response.status_code in [200, 204]:
-        print("File deletion test passed!")
-        return True
-    else:
-        print(response.json() if response.text else response.text)
-        print("File deletion test failed!")
-        return False
+    assert response.status_code == 200, f"List files failed: {response.text[:500]}"
 
+    data = orjson.loads(response.content)
+    logger.info("Found %s files", len(data))
+    if data:
+        logger.info("First file: %s", data[0]['original_filename'])
 
-def run_all_tests():
-    print("=== Starting File Management Tests ===")
 
-    # Set an existing course ID
-    global course_id
-    course_id = 1  # Replace with an actual course ID from your system
+async def test_download_file(instructor_client, file_id):
+    # Download file, counting the bytes as they arrive instead of buffering the whole body
+    async with instructor_client.stream(
+        "GET",
+        f"{files_url()}/download/{file_id}"
+    ) as response:
+        logger.info("Download File Response: %s", response.status_code)
 
-    # Login first
-    if not login():
-        print("Login failed, aborting tests")
-        return
+        # The body of a streamed response is not read, so only the status is reported
+        assert response.status_code == 200, "File download failed"
 
-    tests = [
-        test_upload_file,
-        test_list_files,
-        test_download_file,
-        test_delete_file
-    ]
+        content_length = 0
+        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+            content_length += len(chunk)
 
-    results = []
+    logger.info("File downloaded, content length: %s bytes", content_length)
 
-    for test in tests:
-        try:
-            result = test()
-            results.append((test.__name__, result))
-        except Exception as e:
-            print(f"Error in {test.__name__}: {str(e)}")
-            results.append((test.__name__, False))
 
-    print("\n=== File Management Test Results ===")
-    for name, result in results:
-        status = "PASSED" if result else "FAILED"
-        print(f"{name}: {status}")
+async def test_delete_file(instructor_client, file_id):
+    # Delete file
+    response = await instructor_client.delete(
+        f"{files_url()}/{file_id}"
+    )
 
+    logger.info("Delete File Response: %s", response.status_code)
 
-if __name__ == "__main__":
-    run_all_tests()
\ No newline at end of file
+    assert response.status_code in [200, 204], f"File deletion failed: {response.text[:500]}"
@@ -0,0 +1,139 @@
+# tests/test_jwt.py
+import base64
+import calendar
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta
+import jwt
+import orjson
+import pytest
+
+from security.authentication import auth
+
+
+@pytest.fixture(autouse=True)
+def clear_jwt_cache():
+    # Verified payloads are cached by token string; start every test from a cold cache
+    auth._jwt_cache.clear()
+    yield
+    auth._jwt_cache.clear()
+
+
+def _segment(data: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(data)).rstrip(b"=").decode()
+
+
+def _sign(header_segment: str, payload_segment: str) -> str:
+    # Sign arbitrary segments with the real secret, so only the checked field is wrong
+    signing_input = f"{header_segment}.{payload_segment}"
+    signature = hmac.new(auth.JWT_SECRET_BYTES, signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+
+def test_decodes_pyjwt_tokens():
+    payload = {"sub": "1", "username": "admin_test", "roles": ["admin"], "exp": int(time.time()) + 60}
+    token = jwt.encode(payload, auth.JWT_SECRET, algorithm="HS256")
+
+    assert auth._decode_hs256(token) == payload
+    assert auth.decode_access_token(token) == payload
+
+
+def test_tampered_signature_is_rejected():
+    token = jwt.encode({"sub": "1", "exp": int(time.time()) + 60}, auth.JWT_SECRET, algorithm="HS256")
+    signing_input, _, signature = token.rpartition(".")
+    # The first character carries six signature bits, unlike the padding bits at the end
+    tampered = f"{signing_input}.{'B' if signature[0] == 'A' else 'A'}{signature[1:]}"
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        auth._decode_hs256(tampered)
+
+
+def test_token_signed_with_another_key_is_rejected():
+    token = jwt.encode({"sub": "1"}, auth.JWT_SECRET + "-other", algorithm="HS256")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        auth._decode_hs256(token)
+
+
+@pytest.mark.parametrize("alg", ["none", "HS512"])
+def test_other_algorithms_are_rejected(alg):
+    payload_segment = _segment({"sub": "1"})
+
+    # Unsigned token, as an attacker would send it
+    with pytest.raises(jwt.InvalidTokenError):
+        auth._decode_hs256(f"{_segment({'alg': alg, 'typ': 'JWT'})}.{payload_segment}.")
+
+    # Correct HMAC-SHA256 signature, so only the header is wrong
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        auth._decode_hs256(_sign(_segment({"alg": alg, "typ": "JWT"}), payload_segment))
+
+
+@pytest.mark.parametrize("token", ["", "a.b", "a.b.c.d"])
+def test_wrong_segment_count_is_rejected(token):
+    with pytest.raises(jwt.DecodeError):
+        auth._decode_hs256(token)
+
+
+def test_bad_base64_is_rejected():
+    with pytest.raises(jwt.DecodeError):
+        auth._decode_hs256(_sign("a", _segment({"sub": "1"})))
+
+
+@pytest.mark.parametrize("payload_segment", [
+    base64.urlsafe_b64encode(b"not json").rstrip(b"=").decode(),
+    _segment(["not", "an", "object"]),
+])
+def test_bad_json_is_rejected(payload_segment):
+    with pytest.raises(jwt.DecodeError):
+        auth._decode_hs256(_sign(_segment({"alg": "HS256", "typ": "JWT"}), payload_segment))
+
+
+def test_expired_token_is_rejected():
+    token = jwt.encode({"sub": "1", "exp": int(time.time()) - 1}, auth.JWT_SECRET, algorithm="HS256")
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        auth.decode_access_token(token)
+
+
+def test_expired_token_is_rejected_on_cache_hit(monkeypatch):
+    now = time.time()
+    token = jwt.encode({"sub": "1", "exp": int(now) + 10}, auth.JWT_SECRET, algorithm="HS256")
+
+    # Verified and cached while still valid
+    auth.decode_access_token(token)
+    assert token in auth._jwt_cache
+
+    monkeypatch.setattr(time, "time", lambda: now + 20)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        auth.decode_access_token(token)
+
+
+def test_future_nbf_is_rejected():
+    token = jwt.encode({"sub": "1", "nbf": int(time.time()) + 60}, auth.JWT_SECRET, algorithm="HS256")
+
+    with pytest.raises(jwt.ImmatureSignatureError):
+        auth._decode_hs256(token)
+
+
+def test_pyjwt_accepts_issued_tokens():
+    token, expire = auth.create_access_token({"sub": "1", "username": "admin_test", "roles": ["admin"]})
+
+    payload = jwt.decode(token, auth.JWT_SECRET, algorithms=["HS256"])
+
+    assert payload["sub"] == "1"
+    assert payload["exp"] == calendar.timegm(expire.utctimetuple())
+
+
+def test_datetime_time_claims_are_numeric_dates():
+    issued_at = datetime.utcnow()
+    not_before = issued_at - timedelta(seconds=1)
+    token, _ = auth.create_access_token({"sub": "1", "iat": issued_at, "nbf": not_before})
+
+    # PyJWT validates iat and nbf as numbers, so ISO strings would be rejected here
+    payload = jwt.decode(token, auth.JWT_SECRET, algorithms=["HS256"])
+
+    assert payload["iat"] == calendar.timegm(issued_at.utctimetuple())
+    assert payload["nbf"] == calendar.timegm(not_before.utctimetuple())
+    assert auth._decode_hs256(token) == payload
@@ -0,0 +1,186 @@
+# tests/test_notification_idempotency.py
+import json
+import pytest
+from fastapi import HTTPException
+
+from fake_redis import FakeAsyncRedis
+from microservices.notification_service import idempotency, main
+from microservices.notification_service.push import sender
+from microservices.notification_service.schemas import PushNotification, WebSocketNotification
+from microservices.notification_service.websocket import handler
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeWebSocket:
+    """Records sent messages, or raises on send when `fail` is set"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(json.loads(text))
+
+
+class FakeProducer:
+    def produce(self, *args, **kwargs):
+        pass
+
+    def flush(self):
+        pass
+
+
+def seen_key(notification_id, channel):
+    return idempotency.NOTIFICATION_SEEN_KEY.format(channel=channel, notification_id=notification_id)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake_redis = FakeAsyncRedis()
+    for module in (sender, main, handler):
+        monkeypatch.setattr(module, "get_async_redis_client", lambda: fake_redis)
+    return fake_redis
+
+
+async def test_second_claim_is_refused(fake_redis):
+    assert await idempotency.claim_notification(fake_redis, "n1", "push") is True
+    assert await idempotency.claim_notification(fake_redis, "n1", "push") is False
+
+    # Claims are per channel
+    assert await idempotency.claim_notification(fake_redis, "n1", "websocket") is True
+    assert fake_redis.expiries[seen_key("n1", "push")] == idempotency.NOTIFICATION_SEEN_TTL
+
+
+async def test_released_claim_can_be_taken_again(fake_redis):
+    await idempotency.claim_notification(fake_redis, "n1", "push")
+    await idempotency.release_notification(fake_redis, "n1", "push")
+
+    assert await idempotency.claim_notification(fake_redis, "n1", "push") is True
+
+
+async def test_redis_error_fails_open(fake_redis):
+    fake_redis.fail = True
+
+    # Dispatch rather than drop, and releasing does not raise either
+    assert await idempotency.claim_notification(fake_redis, "n1", "push") is True
+    assert await idempotency.claim_notification(fake_redis, "n1", "push") is True
+    await idempotency.release_notification(fake_redis, "n1", "push")
+
+
+@pytest.fixture
+def firebase_sends(monkeypatch):
+    # Push sends go to one Firebase device whose result is taken from the list
+    results = []
+    sent = []
+
+    async def get_user_device_tokens(user_id):
+        return [{"token": f"firebase_token_{user_id}", "type": "firebase"}]
+
+    async def send_firebase_notification(token, notification):
+        sent.append(notification.notification_id)
+        return results.pop(0)
+
+    monkeypatch.setattr(sender, "get_user_device_tokens", get_user_device_tokens)
+    monkeypatch.setattr(sender, "send_firebase_notification", send_firebase_notification)
+
+    return results, sent
+
+
+async def test_push_is_dispatched_once(fake_redis, firebase_sends):
+    results, sent = firebase_sends
+    results.append(True)
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    assert await sender.send_push_notification(notification) is True
+    assert await sender.send_push_notification(notification) is True
+    assert sent == [notification.notification_id]
+
+
+async def test_failed_push_releases_claim(fake_redis, firebase_sends):
+    results, sent = firebase_sends
+    results.extend([False, True])
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    assert await sender.send_push_notification(notification) is False
+    assert seen_key(notification.notification_id, "push") not in fake_redis.data
+
+    # The retry is dispatched again
+    assert await sender.send_push_notification(notification) is True
+    assert sent == [notification.notification_id] * 2
+
+
+async def test_push_error_releases_claim(fake_redis, monkeypatch):
+    async def get_user_device_tokens(user_id):
+        raise RuntimeError("device store unavailable")
+
+    monkeypatch.setattr(sender, "get_user_device_tokens", get_user_device_tokens)
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    with pytest.raises(RuntimeError):
+        await sender.send_push_notification(notification)
+    assert seen_key(notification.notification_id, "push") not in fake_redis.data
+
+
+@pytest.fixture
+def connected_client(monkeypatch):
+    websocket = FakeWebSocket()
+    monkeypatch.setitem(main.connected_clients, 1, websocket)
+    monkeypatch.setattr(main, "get_kafka_producer", FakeProducer)
+    return websocket
+
+
+async def test_websocket_notification_is_sent_once(fake_redis, connected_client):
+    notification = WebSocketNotification(recipient_id=1, notification_type="info", title="Title", message="Hi")
+
+    first = await main.send_websocket_notification(notification)
+    second = await main.send_websocket_notification(notification)
+
+    assert first["status"] == "sent"
+    assert second == {"status": "duplicate", "notification_id": notification.notification_id}
+    assert len(connected_client.sent) == 1
+
+
+async def test_failed_websocket_send_releases_claim(fake_redis, connected_client):
+    connected_client.fail = True
+    notification = WebSocketNotification(recipient_id=1, notification_type="info", title="Title", message="Hi")
+
+    with pytest.raises(HTTPException):
+        await main.send_websocket_notification(notification)
+    assert seen_key(notification.notification_id, "websocket") not in fake_redis.data
+
+
+async def queue(fake_redis, user_id, *notification_ids):
+    # Queued the way ConnectionManager.queue_notification does, newest first
+    for notification_id in notification_ids:
+        await fake_redis.lpush(f"user:notifications:{user_id}", json.dumps({"id": notification_id}))
+
+
+async def test_queued_notifications_are_delivered_once(fake_redis):
+    manager = handler.ConnectionManager()
+    await queue(fake_redis, 1, "q1", "q2")
+    # q1 was already delivered through another connection
+    await idempotency.claim_notification(fake_redis, "q1", "queued")
+
+    websocket = FakeWebSocket()
+    await manager.send_queued_notifications(1, websocket)
+
+    assert websocket.sent == [{"id": "q2", "queued": True}]
+    assert "user:notifications:1" not in fake_redis.data
+
+
+async def test_undelivered_queued_notifications_are_requeued(fake_redis):
+    manager = handler.ConnectionManager()
+    await queue(fake_redis, 1, "q1", "q2")
+
+    await manager.send_queued_notifications(1, FakeWebSocket(fail=True))
+
+    # Both are back in the queue, in their original order, and can be claimed again
+    assert await fake_redis.lrange("user:notifications:1", 0, -1) == [
+        json.dumps({"id": "q2"}),
+        json.dumps({"id": "q1"}),
+    ]
+    assert seen_key("q1", "queued") not in fake_redis.data
+    assert seen_key("q2", "queued") not in fake_redis.data
@@ -0,0 +1,204 @@
+# tests/test_push_sender.py
+import asyncio
+import json
+from types import SimpleNamespace
+import httpx
+import pytest
+
+from fake_redis import FakeAsyncRedis
+from microservices.notification_service.push import sender
+from microservices.notification_service.schemas import PushNotification
+
+pytestmark = pytest.mark.asyncio
+
+
+class Clock:
+    """Manually advanced replacement for time.monotonic inside the sender module"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the sender's view of time is replaced, the event loop keeps the real clock
+    monkeypatch.setattr(sender, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake_redis = FakeAsyncRedis()
+    monkeypatch.setattr(sender, "get_async_redis_client", lambda: fake_redis)
+    return fake_redis
+
+
+@pytest.fixture
+def no_retry_wait(monkeypatch):
+    monkeypatch.setattr(sender, "PUSH_RETRY_INITIAL_WAIT", 0)
+    monkeypatch.setattr(sender, "PUSH_RETRY_MAX_WAIT", 0)
+
+
+async def succeed():
+    return "ok"
+
+
+async def fail():
+    raise RuntimeError("provider down")
+
+
+async def open_breaker(breaker):
+    for _ in range(breaker.fail_max):
+        with pytest.raises(RuntimeError):
+            await breaker.call(fail)
+
+
+async def test_circuit_opens_after_fail_max_failures(clock):
+    breaker = sender.CircuitBreaker("test", fail_max=3, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await breaker.call(fail)
+    assert not breaker.is_open
+
+    with pytest.raises(RuntimeError):
+        await breaker.call(fail)
+    assert breaker.is_open
+
+
+async def test_open_circuit_fails_fast(clock):
+    breaker = sender.CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    await open_breaker(breaker)
+
+    calls = []
+
+    async def record():
+        calls.append(1)
+
+    clock.now += 59
+    with pytest.raises(sender.CircuitBreakerError):
+        await breaker.call(record)
+    assert calls == []
+
+
+async def test_half_open_lets_one_trial_through(clock):
+    breaker = sender.CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    await open_breaker(breaker)
+    clock.now += 60
+
+    release = asyncio.Event()
+
+    async def slow_trial():
+        await release.wait()
+        return "ok"
+
+    trial = asyncio.ensure_future(breaker.call(slow_trial))
+    await asyncio.sleep(0)
+
+    # A second call while the trial is in flight is rejected
+    with pytest.raises(sender.CircuitBreakerError):
+        await breaker.call(succeed)
+
+    release.set()
+    assert await trial == "ok"
+
+
+async def test_successful_trial_closes_circuit(clock):
+    breaker = sender.CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    await open_breaker(breaker)
+    clock.now += 60
+
+    assert await breaker.call(succeed) == "ok"
+    assert not breaker.is_open
+    assert breaker.failure_count == 0
+    assert await breaker.call(succeed) == "ok"
+
+
+async def test_failed_trial_reopens_circuit(clock):
+    breaker = sender.CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    await open_breaker(breaker)
+    clock.now += 60
+
+    with pytest.raises(RuntimeError):
+        await breaker.call(fail)
+    assert breaker.is_open
+
+    with pytest.raises(sender.CircuitBreakerError):
+        await breaker.call(succeed)
+
+
+async def test_open_circuit_moves_firebase_payload_to_dead_letter_queue(clock, fake_redis, monkeypatch):
+    breaker = sender.CircuitBreaker("firebase", fail_max=1, reset_timeout=60)
+    await open_breaker(breaker)
+    monkeypatch.setitem(sender.circuit_breakers, "firebase", breaker)
+    monkeypatch.setattr(sender, "FIREBASE_SERVER_KEY", "test-key")
+
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    assert await sender.send_firebase_notification("device-token", notification) is False
+
+    queued = fake_redis.data[sender.PUSH_DLQ_KEY.format(provider="firebase")]
+    assert queued == [json.dumps({
+        "to": "device-token",
+        "notification": {"title": "Title", "body": "Body", "icon": None, "click_action": "OPEN_APP"},
+        "data": {"notification_id": notification.notification_id}
+    })]
+    assert sender.PUSH_DLQ_KEY.format(provider="firebase") == "push:dlq:firebase"
+
+
+@pytest.fixture
+def firebase_responses(monkeypatch):
+    # Serve Firebase requests from a list of status codes through a mock transport
+    statuses = []
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status_code = statuses.pop(0)
+        return httpx.Response(status_code, json={"success": 1} if status_code == 200 else {})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda: real_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(sender, "FIREBASE_SERVER_KEY", "test-key")
+    monkeypatch.setitem(sender.circuit_breakers, "firebase", sender.CircuitBreaker("firebase"))
+
+    return SimpleNamespace(statuses=statuses, requests=requests)
+
+
+async def test_firebase_server_error_is_retried(firebase_responses, no_retry_wait):
+    firebase_responses.statuses.extend([503, 502, 200])
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    assert await sender.send_firebase_notification("device-token", notification) is True
+    assert len(firebase_responses.requests) == 3
+    assert sender.circuit_breakers["firebase"].failure_count == 0
+
+
+async def test_firebase_server_error_counts_as_breaker_failure(firebase_responses, no_retry_wait, monkeypatch):
+    firebase_responses.statuses.extend([500] * sender.PUSH_RETRY_ATTEMPTS)
+    notification = PushNotification(recipient_id=1, title="Title", body="Body")
+
+    # Record what the breaker sees once the retries are exhausted
+    breaker = sender.circuit_breakers["firebase"]
+    breaker_call = breaker.call
+    raised = []
+
+    async def spy_call(func, *args, **kwargs):
+        try:
+            return await breaker_call(func, *args, **kwargs)
+        except Exception as e:
+            raised.append(e)
+            raise
+
+    monkeypatch.setattr(breaker, "call", spy_call)
+
+    assert await sender.send_firebase_notification("device-token", notification) is False
+    assert len(firebase_responses.requests) == sender.PUSH_RETRY_ATTEMPTS
+    assert isinstance(raised[0], sender.PushProviderError)
+    assert raised[0].response.status_code == 500
+    assert breaker.failure_count == 1
+
@@ -1,50 +1,25 @@
 # tests/test_users_api.py
 import pytest
-from fastapi.testclient import TestClient
 
-from core.lms_core.main import app
-from security.authentication.auth import create_access_token
-
-# Setup test client
-client = TestClient(app)
-
-
-def test_get_users(db_session):
-    # Create test token for admin
-    admin_token_data = {
-        "sub": "1",  # admin_user.id
-        "username": "admin_test",
-        "roles": ["admin"]
-    }
-    access_token, _ = create_access_token(admin_token_data)
 
+def test_get_users(db_session, admin_client):
     # Test get users endpoint
-    response = client.get(
-        "/api/v1/users/",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
+    response = admin_client.get("/api/v1/users/")
 
     # Assert response
     assert response.status_code == 200
     users = response.json()
     assert len(users) >= 3  # At least our 3 test users
 
-    # Verify user data
-    assert any(user["username"] == "admin_test" for user in users)
-    assert any(user["username"] == "teacher_test" for user in users)
-    assert any(user["username"] == "student_test" for user in users)
+    # Verify user data; a failed subset check shows the missing usernames
+    usernames = {user["username"] for user in users}
+    assert {"admin_test", "teacher_test", "student_test"} <= usernames
 
 
-def test_create_user(db_session):
-    # Create test token for admin
-    admin_token_data = {
-        "sub": "1",  # admin_user.id
-        "username": "admin_test",
-        "roles": ["admin"]
-    }
-    access_token, _ = create_access_token(admin_token_data)
-
-    # Test create user endpoint
+@pytest.fixture(scope="session")
+def created_student(admin_client):
+    # Create the user once per session, the API hashes its password on every create;
+    # the user is deleted again at the end of the session
     new_user_data = {
         "username": "new_test_user",
         "email": "newuser@example.com",
@@ -54,15 +29,21 @@ def test_create_user(db_session):
         "roles": ["student"]
     }
 
-    response = client.post(
+    response = admin_client.post(
         "/api/v1/users/",
-        json=new_user_data,
-        headers={"Authorization": f"Bearer {access_token}"}
+        json=new_user_data
     )
 
+    yield response
+
+    if response.status_code == 201:
+        admin_client.delete(f"/api/v1/users/{response.json()['id']}")
+
+
+def test_create_user(db_session, created_student):
     # Assert response
-    assert response.status_code == 201
-    created_user = response.json()
+    assert created_student.status_code == 201
+    created_user = created_student.json()
     assert created_user["username"] == "new_test_user"
     assert created_user["email"] == "newuser@example.com"
-    assert "hashed_password" not in created_user
\ No newline at end of file
+    assert "hashed_password" not in created_user
@@ -0,0 +1,137 @@
+# tests/test_websocket_presence.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+import pytest_asyncio
+
+from fake_redis import FakeAsyncRedis
+from microservices.notification_service.websocket import handler
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake_redis = FakeAsyncRedis()
+    monkeypatch.setattr(handler, "get_async_redis_client", lambda: fake_redis)
+    return fake_redis
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Wall clock used for heartbeat scores, advanced by the tests
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(handler, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest_asyncio.fixture
+async def managers(fake_redis, clock):
+    # Two instances sharing one Redis
+    managers = [handler.ConnectionManager("instance-a"), handler.ConnectionManager("instance-b")]
+    yield managers
+    for manager in managers:
+        await manager.close()
+
+
+async def test_online_users_span_instances(fake_redis, managers):
+    a, b = managers
+    await a.connect(FakeWebSocket(), 1)
+    await b.connect(FakeWebSocket(), 2)
+    await b.connect(FakeWebSocket(), 1)
+    await a.heartbeat()
+    await b.heartbeat()
+
+    assert sorted(await a.get_online_users()) == [1, 2]
+    assert await b.get_online_user_count() == 2
+
+
+async def test_count_leaves_no_scratch_key(fake_redis, managers):
+    a, _ = managers
+    await a.connect(FakeWebSocket(), 1)
+    await a.heartbeat()
+
+    assert await a.get_online_user_count() == 1
+    assert not [key for key in fake_redis.data if key.startswith("ws:online_users")]
+
+
+async def test_user_stays_online_until_last_connection_closes(fake_redis, managers):
+    a, _ = managers
+    first, second = FakeWebSocket(), FakeWebSocket()
+    await a.connect(first, 1)
+    await a.connect(second, 1)
+    await a.heartbeat()
+
+    await a.disconnect(first, 1)
+    assert await a.get_online_users() == [1]
+
+    await a.disconnect(second, 1)
+    assert await a.get_online_users() == []
+
+    # A repeated disconnect does not touch the shared state again
+    await a.disconnect(second, 1)
+    assert await a.get_online_users() == []
+
+
+async def test_silent_instance_is_pruned(fake_redis, clock, managers):
+    a, b = managers
+    await a.connect(FakeWebSocket(), 1)
+    await b.connect(FakeWebSocket(), 2)
+    await b.heartbeat()
+
+    # Only instance A keeps beating
+    clock.now += handler.INSTANCE_TTL + 1
+    await a.heartbeat()
+
+    assert await a.get_online_users() == [1]
+    assert await fake_redis.zrange(handler.ONLINE_INSTANCES_KEY, 0, -1) == ["instance-a"]
+
+
+async def test_heartbeat_rebuilds_instance_set(fake_redis, managers):
+    a, _ = managers
+    await a.connect(FakeWebSocket(), 1)
+    await fake_redis.sadd(a.instance_users_key, 99)
+
+    await a.heartbeat()
+
+    assert await fake_redis.smembers(a.instance_users_key) == {"1"}
+    assert fake_redis.expiries[a.instance_users_key] == handler.INSTANCE_TTL
+
+
+async def test_heartbeat_waits_for_presence_updates(fake_redis, managers):
+    a, _ = managers
+    await a.connect(FakeWebSocket(), 1)
+    await fake_redis.sadd(a.instance_users_key, 99)
+
+    # A heartbeat started while a connect holds the lock neither snapshots nor writes until it is released
+    async with a._presence_lock:
+        beat = asyncio.ensure_future(a.heartbeat())
+        await asyncio.sleep(0)
+        assert "99" in await fake_redis.smembers(a.instance_users_key)
+
+        a.active_connections[2] = {FakeWebSocket()}
+        await fake_redis.sadd(a.instance_users_key, 2)
+    await beat
+
+    assert await fake_redis.smembers(a.instance_users_key) == {"1", "2"}
+
+
+async def test_close_withdraws_instance(fake_redis, managers):
+    a, b = managers
+    await a.connect(FakeWebSocket(), 1)
+    await b.connect(FakeWebSocket(), 2)
+    await a.heartbeat()
+    await b.heartbeat()
+
+    await a.close()
+
+    assert await b.get_online_users() == [2]
+    assert a.instance_users_key not in fake_redis.data
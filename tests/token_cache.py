@@ -0,0 +1,97 @@
+# tests/token_cache.py
+import contextlib
+import json
+import os
+import tempfile
+import time
+import jwt
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Access tokens issued to the fixed test users, reused across test runs;
+# delete this file to force fresh logins, e.g. after the test users changed
+TOKEN_CACHE_FILE = os.path.join(os.path.dirname(__file__), ".auth_cache.json")
+
+# Serializes cache updates between xdist workers and concurrent runs
+TOKEN_CACHE_LOCK_FILE = os.path.join(os.path.dirname(__file__), ".auth_cache.lock")
+
+# Tokens closer than this to expiry are not reused
+TOKEN_MIN_TTL = 60  # seconds
+
+
+def _load_cache():
+    try:
+        with open(TOKEN_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextlib.contextmanager
+def _locked():
+    # Exclusive lock for a read-modify-write of the cache; a no-op where fcntl is missing
+    if fcntl is None:
+        yield
+        return
+
+    with open(TOKEN_CACHE_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _cache_key(username, base_url):
+    return f"{base_url}|{username}"
+
+
+def get_cached_token(username, base_url):
+    """
+    Get a previously issued access token that is still valid
+
+    Args:
+        username: User the token was issued to
+        base_url: API the token was issued by
+
+    Returns:
+        The cached token, or None if there is none or it expires within TOKEN_MIN_TTL
+    """
+    entry = _load_cache().get(_cache_key(username, base_url))
+
+    if entry and entry["exp"] - time.time() > TOKEN_MIN_TTL:
+        return entry["token"]
+
+    return None
+
+
+def cache_token(username, base_url, token):
+    """
+    Store an access token until its exp claim
+
+    Args:
+        username: User the token was issued to
+        base_url: API the token was issued by
+        token: Access token returned by the login endpoint
+    """
+    # Only the expiry is needed, the API verifies the token itself
+    exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    if exp is None:
+        return
+
+    with _locked():
+        cache = _load_cache()
+        cache[_cache_key(username, base_url)] = {"token": token, "exp": exp}
+
+        # Write a temporary file and swap it in, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(TOKEN_CACHE_FILE), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(temp_path, TOKEN_CACHE_FILE)
+        except BaseException:
+            os.unlink(temp_path)
+            raise